@@ -20,6 +20,7 @@ from datavalid.spinner import Spinner
 import deba
 
 from lib.date import combine_date_columns
+from lib.match import ParallelThresholdMatcher
 
 common_names = [
     "Michael Smith",
@@ -138,7 +139,7 @@ def cross_match_officers_between_agencies(personnel, events, constraints, post):
     common_names_sr = full_names[full_names.isin(common_names)]
 
     excel_path = deba.data("match/cross_agency_officers.xlsx")
-    matcher = ThresholdMatcher(
+    matcher = ParallelThresholdMatcher(
         index=MultiIndex(
             [
                 # or if they are in the same attract constraint
@@ -93,7 +93,134 @@ def clean_date(val: str) -> tuple[str, str, str]:
     raise ValueError('unknown date format "%s"' % val)
 
 
-def clean_dates(df: pd.DataFrame, cols: list[str], expand: bool = True) -> pd.DataFrame:
+# known date formats in the order they are tried by clean_date, each with
+# a pattern equivalent to the one used in clean_date but with capture groups
+date_formats = [
+    ("mm/dd/yyyy", r"^(\d{1,2})/(\d{1,2})/(\d{4})$"),
+    ("mm/dd/yy", r"^(\d{1,2})/(\d{1,2})/(\d{2})$"),
+    ("mm-dd-yy", r"^(\d{1,2})-(\d{1,2})-(\d{2})$"),
+    ("dd-mon-yy", r"^(\d{1,2})-(\w{3})-(\d{2})$"),
+    ("yyyymm", r"^((?:19|20)\d{2})(\d{2})$"),
+    ("yyyy", r"^((?:19|20)\d{2})$"),
+    ("mon-dd", r"^([A-Z][a-z]{2}-\d{1,2})$"),
+]
+
+
+def _full_year_strs(years: pd.Series) -> pd.Series:
+    """Vectorized version of full_year_str"""
+    century = pd.Series(
+        np.where(years.str[0].isin(["1", "2", "0"]), "20", "19"), index=years.index
+    )
+    return years.where(years.str.len() == 4, century + years)
+
+
+def _swap_month_day_strs(
+    months: pd.Series, days: pd.Series
+) -> Tuple[pd.Series, pd.Series]:
+    """Vectorized version of swap_month_day"""
+    swap = (months.map(int) > 12) & (days.map(int) <= 12)
+    return months.where(~swap, days), days.where(~swap, months)
+
+
+def clean_date_series(
+    series: pd.Series, format_counts: dict or None = None
+) -> pd.DataFrame:
+    """Parses a series of date strings with the same known patterns as clean_date
+
+    Each distinct value is parsed only once. Values are classified into formats
+    with vectorized regex passes and each format group is parsed in bulk.
+
+    Args:
+        series (pd.Series):
+            the date strings to parse
+        format_counts (dict):
+            if given, the number of values matching each date format is added to
+            this dict. Empty values are counted under "empty".
+
+    Returns:
+        a frame with year, month and day string columns, indexed like series
+
+    Raises:
+        ValueError:
+            date string format is unknown
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object)
+    years = pd.Series("", index=uniques.index, dtype=object)
+    months = years.copy()
+    days = years.copy()
+    format_inds = pd.Series(-1, index=uniques.index)
+    errors = dict()
+    remaining = uniques != ""
+
+    def strptime_each(vals: pd.Series, format: str) -> pd.Series:
+        parsed = dict()
+        for val in vals.unique():
+            try:
+                parsed[val] = datetime.datetime.strptime(val, format)
+            except ValueError as e:
+                parsed[val] = e
+        result = vals.map(lambda v: parsed[v])
+        failed = result.map(lambda v: isinstance(v, ValueError))
+        errors.update(result[failed].items())
+        return result[~failed]
+
+    for format_ind, (_, pattern) in enumerate(date_formats):
+        groups = uniques[remaining].str.extract(pattern)
+        groups = groups.loc[groups[0].notna()]
+        if groups.shape[0] == 0:
+            continue
+        idx = groups.index
+        remaining.loc[idx] = False
+        format_inds.loc[idx] = format_ind
+        if format_ind <= 2:
+            month, day, year = groups[0], groups[1], groups[2]
+            if format_ind > 0:
+                year = _full_year_strs(year)
+            month, day = _swap_month_day_strs(month, day)
+            years.loc[idx] = year
+            months.loc[idx] = month.str.lstrip("0")
+            days.loc[idx] = day.str.lstrip("0")
+        elif format_ind == 3:
+            dts = strptime_each(groups[1], "%b")
+            years.loc[dts.index] = _full_year_strs(groups.loc[dts.index, 2])
+            months.loc[dts.index] = dts.map(lambda dt: str(dt.month))
+            days.loc[dts.index] = groups.loc[dts.index, 0]
+        elif format_ind == 4:
+            years.loc[idx] = groups[0]
+            months.loc[idx] = groups[1].str.lstrip("0")
+        elif format_ind == 5:
+            years.loc[idx] = groups[0]
+        else:
+            dts = strptime_each(groups[0], "%b-%d")
+            months.loc[dts.index] = dts.map(lambda dt: str(dt.month).zfill(2))
+            days.loc[dts.index] = dts.map(lambda dt: str(dt.day).zfill(2))
+
+    for ind, val in uniques[remaining].items():
+        errors[ind] = ValueError('unknown date format "%s"' % val)
+    if len(errors) > 0:
+        # raise the error of the earliest value just like parsing row by row would
+        raise errors[min(errors.keys())]
+
+    if format_counts is not None:
+        row_format_inds = np.append(format_inds.to_numpy(), -1)[codes]
+        counts = np.bincount(row_format_inds + 1, minlength=len(date_formats) + 1)
+        for name, n in zip(["empty"] + [name for name, _ in date_formats], counts):
+            format_counts[name] = format_counts.get(name, 0) + int(n)
+
+    # code -1 marks missing values, which are parsed as empty strings
+    def broadcast(col: pd.Series) -> np.ndarray:
+        return np.append(col.to_numpy(dtype=object), "")[codes]
+
+    return pd.DataFrame(
+        {"year": broadcast(years), "month": broadcast(months), "day": broadcast(days)},
+        index=series.index,
+    )
+
+
+def clean_dates(
+    df: pd.DataFrame, cols: list[str], expand: bool = True, report_formats: bool = False
+) -> pd.DataFrame:
     """Parses date columns using a few known patterns.
 
     Args:
@@ -104,19 +231,26 @@ def clean_dates(df: pd.DataFrame, cols: list[str], expand: bool = True) -> pd.Da
         expand (bool):
             whether the result should be expanded to _year, _month and
             _day columns. Defaults to True.
+        report_formats (bool):
+            if set to True then print how many values matched each date
+            format. Defaults to False.
 
     Returns:
         the updated frame
     """
     for col in cols:
         assert col.endswith("_date")
-        dates = pd.DataFrame.from_records(
+        format_counts = dict() if report_formats else None
+        dates = clean_date_series(
             df[col]
             .str.strip()
             .str.replace(r"//", r"/", regex=False)
-            .str.replace(r"'", "", regex=False)
-            .map(clean_date)
-        )
+            .str.replace(r"'", "", regex=False),
+            format_counts,
+        ).reset_index(drop=True)
+        dates.columns = [0, 1, 2]
+        if report_formats:
+            print("clean_dates: %s format counts:\n  %s" % (col, format_counts))
         if expand:
             prefix = col[:-5]
             dates.columns = [prefix + "_year", prefix + "_month", prefix + "_day"]
@@ -727,29 +861,77 @@ def canonicalize_officers(
     first_name_column: str = "first_name",
     last_name_column: str = "last_name",
 ) -> pd.DataFrame:
-    for cluster in clusters:
-        uid, first_name, last_name, = None, "", ""
-        for idx in cluster:
-            row = df.loc[df[uid_column] == idx].squeeze()
-            if isinstance(row, pd.DataFrame):
-                row = row.iloc[0]
-            if uid is None or (
-                len(row[first_name_column]) > len(first_name)
-                or (
-                    len(row[first_name_column]) == len(first_name)
-                    and (
-                        len(row[last_name_column]) > len(last_name)
-                    )
-                )
-            ):
-                uid = idx
-                first_name = row[first_name_column]
-                last_name = row[last_name_column]
+    """Replaces the uid and names of every officer in a cluster with those of its canonical officer
+
+    The canonical officer of a cluster is the one with the longest first
+    name, then the longest last name, as found in the first row of each uid.
+    Ties go to the officer that comes first in the cluster. Canonical
+    officers are ranked for all clusters at once and each column is updated
+    with a single map.
 
-        df.loc[df[uid_column].isin(cluster), uid_column] = uid
-        df.loc[df[uid_column].isin(cluster), first_name_column] = first_name
-        df.loc[df[uid_column].isin(cluster), last_name_column] = last_name
+    Args:
+        df (pd.DataFrame):
+            the frame to process
+        clusters (list of tuple):
+            disjoint groups of uids that belong to the same officer, such as
+            returned by ThresholdMatcher.get_index_clusters_within_thresholds
+        uid_column (str):
+            the uid column
+        first_name_column (str):
+            the first name column
+        last_name_column (str):
+            the last name column
+
+    Raises:
+        ValueError: a uid in clusters does not appear in the frame
+
+    Returns:
+        the updated frame
+    """
+    members = pd.DataFrame(
+        [(i, idx) for i, cluster in enumerate(clusters) for idx in cluster],
+        columns=["cluster", uid_column],
+    )
+    if len(members) == 0:
+        return df
+    missing = ~members[uid_column].isin(df[uid_column])
+    if missing.any():
+        raise ValueError("uid not found", members.loc[missing, uid_column].iloc[0])
+    members = members.merge(
+        df[[uid_column, first_name_column, last_name_column]].drop_duplicates(
+            subset=uid_column
+        ),
+        on=uid_column,
+        how="left",
+    )
+    members.loc[:, "first_name_len"] = members[first_name_column].map(len)
+    members.loc[:, "last_name_len"] = members[last_name_column].map(len)
+    members.loc[:, "rank"] = (
+        members.sort_values(
+            ["first_name_len", "last_name_len"], ascending=False, kind="stable"
+        )
+        .groupby("cluster")
+        .cumcount()
+    )
+    canonical = (
+        members.loc[
+            members["rank"] == 0,
+            ["cluster", uid_column, first_name_column, last_name_column],
+        ]
+        .set_index("cluster")
+        .add_suffix("_canonical")
+    )
+    canonical = (
+        members[["cluster", uid_column]]
+        .join(canonical, on="cluster")
+        .drop_duplicates(subset=uid_column)
+        .set_index(uid_column)
+    )
 
+    in_cluster = df[uid_column].isin(canonical.index)
+    uids = df.loc[in_cluster, uid_column]
+    for col in [first_name_column, last_name_column, uid_column]:
+        df.loc[in_cluster, col] = uids.map(canonical[col + "_canonical"])
     return df
 
 
@@ -6,6 +6,7 @@ from pandas.testing import assert_frame_equal
 
 from lib.clean import (
     canonicalize_officers,
+    clean_dates,
     float_to_int_str,
     remove_future_dates,
     clean_sexes,
@@ -41,6 +42,53 @@ class RemoveFutureDatesTestCase(unittest.TestCase):
         )
 
 
+class CleanDatesTestCase(unittest.TestCase):
+    def test_clean_dates(self):
+        df = pd.DataFrame(
+            [
+                [1, "10/3/2001"],
+                [2, "13/02/98"],
+                [3, "Mar-05"],
+                [4, np.nan],
+                [5, "200104"],
+                [6, " 10//3/2001"],
+            ],
+            columns=["id", "hire_date"],
+        )
+        assert_frame_equal(
+            clean_dates(df, ["hire_date"]),
+            pd.DataFrame(
+                [
+                    [1, "2001", "10", "3"],
+                    [2, "1998", "2", "13"],
+                    [3, "", "03", "05"],
+                    [4, "", "", ""],
+                    [5, "2001", "4", ""],
+                    [6, "2001", "10", "3"],
+                ],
+                columns=["id", "hire_year", "hire_month", "hire_day"],
+            ),
+        )
+        assert_frame_equal(
+            clean_dates(df, ["hire_date"], expand=False),
+            pd.DataFrame(
+                {
+                    "id": [1, 2, 3, 4, 5, 6],
+                    "hire_date": pd.to_datetime(
+                        ["2001-10-03", "1998-02-13", None, None, None, "2001-10-03"]
+                    ),
+                }
+            ),
+        )
+
+    def test_clean_dates_unknown_format(self):
+        with self.assertRaisesRegex(ValueError, 'unknown date format "2001.10.3"'):
+            clean_dates(
+                pd.DataFrame({"hire_date": ["10/3/2001", "2001.10.3", "abc"]}),
+                ["hire_date"],
+            )
+
+
 class FloatToIntStrTestCase(unittest.TestCase):
     def test_float_to_int_str(self):
         """
@@ -233,6 +281,33 @@ class CanonicalizeOfficersTestCase(unittest.TestCase):
             ),
         )
 
+    def test_canonicalize_officers_tie_break(self):
+        df = pd.DataFrame(
+            [
+                ["a", "jon", "lee"],
+                ["b", "john", "lee"],
+                ["c", "mary", "lee"],
+                ["d", "kim", "smith"],
+                ["a", "jonathan", "lee"],
+            ],
+            columns=["uid", "first_name", "last_name"],
+        )
+        assert_frame_equal(
+            canonicalize_officers(df, [("a", "b", "c"), ("d",)]),
+            pd.DataFrame(
+                [
+                    ["b", "john", "lee"],
+                    ["b", "john", "lee"],
+                    ["b", "john", "lee"],
+                    ["d", "kim", "smith"],
+                    ["b", "john", "lee"],
+                ],
+                columns=["uid", "first_name", "last_name"],
+            ),
+        )
+        with self.assertRaises(ValueError):
+            canonicalize_officers(df, [("a", "e")])
+
 
 def test_middle_name(self):
     assert_frame_equal(
@@ -79,7 +79,7 @@ def rearrange_personnel_columns(df: pd.DataFrame) -> pd.DataFrame:
             ["first_name", "last_name", "middle_name", "middle_initial", "rank_desc"],
         )
         .pipe(float_to_int_str, ["birth_year", "birth_month", "birth_day"])
-        .sort_values("uid"),
+        .sort_values("uid", kind="stable"),
     )
 
 
@@ -112,7 +112,7 @@ def rearrange_event_columns(df):
                 "department_code",
                 "rank_code",
             ],
-        ).sort_values(["agency", "kind", "event_uid"]),
+        ).sort_values(["agency", "kind", "event_uid"], kind="stable"),
     )
 
 
@@ -135,7 +135,7 @@ def rearrange_allegation_columns(df):
         "allegation",
         df[~((df.allegation_uid.fillna("") == ""))]
         .pipe(float_to_int_str, ["paragraph_code"])
-        .sort_values(["agency", "allegation_uid"]),
+        .sort_values(["agency", "allegation_uid"], kind="stable"),
     )
 
 
@@ -156,7 +156,9 @@ def rearrange_appeal_hearing_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "appeal_hearing",
-        df.pipe(names_to_title_case, ["counsel"]).sort_values(["agency", "appeal_uid"]),
+        df.pipe(names_to_title_case, ["counsel"]).sort_values(
+            ["agency", "appeal_uid"], kind="stable"
+        ),
     )
 
 
@@ -187,7 +189,7 @@ def rearrange_use_of_force(df):
                 "officer_years_exp",
                 "officer_years_with_unit",
             ],
-        ).sort_values(["agency", "uof_uid"]),
+        ).sort_values(["agency", "uof_uid"], kind="stable"),
     )
 
 
@@ -213,7 +215,7 @@ def rearrange_stop_and_search_columns(df):
             ["stop_and_search_year", "stop_and_search_month", "stop_and_search_day"],
         )
         .pipe(names_to_title_case, ["first_name", "last_name", "middle_name"])
-        .sort_values(["agency", "stop_and_search_uid"]),
+        .sort_values(["agency", "stop_and_search_uid"], kind="stable"),
     )
 
 
@@ -234,7 +236,7 @@ def rearrange_award_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "award",
-        df.sort_values(["agency", "award_uid"]),
+        df.sort_values(["agency", "award_uid"], kind="stable"),
     )
 
 
@@ -255,7 +257,7 @@ def rearrange_brady_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "brady",
-        df.sort_values(["agency", "brady_uid"]),
+        df.sort_values(["agency", "brady_uid"], kind="stable"),
     )
 
 
@@ -276,7 +278,7 @@ def rearrange_property_claims_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "property_claims",
-        df.sort_values(["agency", "property_claims_uid"]),
+        df.sort_values(["agency", "property_claims_uid"], kind="stable"),
     )
 
 
@@ -297,7 +299,7 @@ def rearrange_post_officer_history_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "post_officer_history",
-        df.sort_values(["history_id", "uid"]),
+        df.sort_values(["history_id", "uid"], kind="stable"),
     )
 
 
@@ -318,7 +320,7 @@ def rearrange_settlement_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "settlement",
-        df.sort_values(["agency", "settlement_uid"]),
+        df.sort_values(["agency", "settlement_uid"], kind="stable"),
     )
 
 
@@ -339,7 +341,7 @@ def rearrange_docs_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "docs",
-        df.sort_values(["agency", "docid"]),
+        df.sort_values(["agency", "docid"], kind="stable"),
     ).pipe(names_to_title_case, ["title"])
 
 
@@ -360,7 +362,7 @@ def rearrange_police_report_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "police_report",
-        df.sort_values(["agency", "police_report_uid"]),
+        df.sort_values(["agency", "police_report_uid"], kind="stable"),
     )
 
 
@@ -381,7 +383,7 @@ def rearrange_citizen_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "citizens",
-        df.sort_values(["agency"]),
+        df.sort_values(["agency"], kind="stable"),
     )
 
 
@@ -402,7 +404,7 @@ def rearrange_coaccusal_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "coaccusals",
-        df.sort_values(["agency"]),
+        df.sort_values(["agency"], kind="stable"),
     )
 
 
@@ -423,7 +425,7 @@ def rearrange_agency_columns(df):
     """
     return datavalid_config.rearrange_columns(
         "agency_reference_list",
-        df.sort_values(["agency_name"]),
+        df.sort_values(["agency_name"], kind="stable"),
     )
 
 
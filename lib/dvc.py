@@ -3,35 +3,91 @@ import hashlib
 import os
 import pathlib
 import json
-from subprocess import run
+import sys
+import tempfile
+import configparser
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import typing
 
 import yaml
 import pandas as pd
 
 
+HASH_CHUNK_SIZE = 1 << 20
+# file in the DVC cache dir that maps file md5 to [sha1, size]. DVC skips
+# files in its cache dir that are not named after a hash.
+SHA1_CACHE_FILENAME = "md5_sha1.json"
+
+
 def _root_dir() -> pathlib.Path:
     return pathlib.Path(os.path.realpath(__file__)).parent.parent
 
 
+def _dvc_config_paths() -> typing.List[pathlib.Path]:
+    """Returns DVC config files from the lowest to the highest precedence"""
+    home = pathlib.Path.home()
+    if sys.platform == "darwin":
+        system_dir = pathlib.Path("/Library/Application Support/dvc")
+        global_dir = home / "Library" / "Application Support" / "dvc"
+    else:
+        xdg_dirs = os.environ.get("XDG_CONFIG_DIRS") or "/etc/xdg"
+        system_dir = pathlib.Path(xdg_dirs.split(os.pathsep)[0]) / "dvc"
+        global_dir = (
+            pathlib.Path(os.environ.get("XDG_CONFIG_HOME") or home / ".config") / "dvc"
+        )
+    system_dir = pathlib.Path(os.environ.get("DVC_SYSTEM_CONFIG_DIR", system_dir))
+    global_dir = pathlib.Path(os.environ.get("DVC_GLOBAL_CONFIG_DIR", global_dir))
+    repo_dir = _root_dir() / ".dvc"
+    return [
+        system_dir / "config",
+        global_dir / "config",
+        repo_dir / "config",
+        repo_dir / "config.local",
+    ]
+
+
+@functools.lru_cache(maxsize=None)
 def dvc_cache_dir() -> str:
-    """Returns DVC cache dir"""
-    return run(
-        ["dvc", "cache", "dir"],
-        capture_output=True,
-        check=True,
-        encoding="utf-8",
-        cwd=_root_dir(),
-    ).stdout.strip()
+    """Returns DVC cache dir
 
+    The cache dir is resolved the same way as `dvc cache dir` but without
+    starting DVC: the "dir" option of the "cache" section is read from the
+    system, global, repo and local config files, the last one that sets it
+    wins and a relative path is relative to the config file that sets it.
+    It defaults to ".dvc/cache". The result is computed once per process.
+    """
+    cache_dir = _root_dir() / ".dvc" / "cache"
+    for path in _dvc_config_paths():
+        if not path.is_file():
+            continue
+        conf = configparser.ConfigParser(interpolation=None)
+        conf.read(path, encoding="utf-8")
+        if conf.has_option("cache", "dir"):
+            cache_dir = path.parent / os.path.expanduser(conf.get("cache", "dir"))
+    return os.path.abspath(cache_dir)
 
-def open_dvc_object_from_cache(cache_dir: str, md5: str):
-    """Reads a DVC object residing in cache"""
-    dir_path = os.path.join(cache_dir, md5[:2], md5[2:])
+
+@functools.lru_cache(maxsize=None)
+def _load_dvc_object(dir_path: str) -> typing.Any:
     with open(dir_path, "r") as f:
         return json.load(f)
 
 
+def open_dvc_object_from_cache(cache_dir: str, md5: str):
+    """Reads a DVC object residing in cache
+
+    Objects are content addressed so each one is parsed once per process.
+    A ".dir" object is a list of file entries and every call returns a new
+    list of new entries so callers are free to modify it.
+    """
+    dir_path = os.path.join(cache_dir, md5[:2], md5[2:])
+    obj = _load_dvc_object(dir_path)
+    if isinstance(obj, list):
+        return [dict(entry) for entry in obj]
+    return obj
+
+
 def open_dvc_files(dir_name: str) -> typing.List[typing.Dict]:
     """Returns files from a DVC-tracked folder
 
@@ -114,7 +170,102 @@ def detect_file_duplications(
         )
 
 
-def gen_filesha1(df: pd.DataFrame, dir_name: str) -> pd.DataFrame:
+def _file_sha1(filepath: str) -> str:
+    hash = hashlib.sha1(usedforsecurity=False)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hash.update(chunk)
+    return hash.hexdigest()
+
+
+def _read_sha1_cache(cache_dir: str) -> typing.Dict[str, typing.List]:
+    try:
+        with open(os.path.join(cache_dir, SHA1_CACHE_FILENAME), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return dict()
+
+
+def _file_stat(filepath: str) -> typing.List[int]:
+    st = os.stat(filepath)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def _update_sha1_cache(cache_dir: str, entries: typing.Dict[str, typing.List]) -> None:
+    # re-read the cache so that entries written by other processes are kept
+    sha1s = _read_sha1_cache(cache_dir)
+    sha1s.update(entries)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    except OSError:
+        # the DVC cache dir may be shared or read-only, hashes are just not cached then
+        return
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(sha1s, f)
+        os.replace(tmp_path, os.path.join(cache_dir, SHA1_CACHE_FILENAME))
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def files_sha1(
+    filepaths: typing.List[str],
+    md5s: typing.Union[typing.List[str], None] = None,
+    cache_dir: typing.Union[str, None] = None,
+    max_workers: int = 8,
+) -> typing.List[str]:
+    """Returns SHA1 hashes of files
+
+    Files are hashed in chunks by a thread pool. If md5s and cache_dir are
+    given, SHA1 hashes are looked up by md5 in a cache kept in the DVC
+    cache dir. A cached hash is only used if the size, mtime and inode of
+    the file are the same as when it was hashed, otherwise the file is read
+    again. Failing to write the cache is not an error.
+
+    Args:
+        filepaths (list of str):
+            paths of the files to hash
+        md5s (list of str):
+            md5 of each file as recorded by DVC
+        cache_dir (str):
+            DVC cache dir
+
+    Returns:
+        SHA1 hash of each file
+    """
+    use_cache = md5s is not None and cache_dir is not None
+    cached = _read_sha1_cache(cache_dir) if use_cache else dict()
+    sha1s = [None] * len(filepaths)
+    stats = [None] * len(filepaths)
+    misses = []
+    for i, filepath in enumerate(filepaths):
+        if use_cache:
+            stats[i] = _file_stat(filepath)
+            entry = cached.get(md5s[i])
+            if entry is not None and entry[1:] == stats[i]:
+                sha1s[i] = entry[0]
+                continue
+        misses.append(i)
+    if len(misses) > 0:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i, sha1 in zip(
+                misses, executor.map(_file_sha1, [filepaths[i] for i in misses])
+            ):
+                sha1s[i] = sha1
+        if use_cache:
+            # stats are taken before hashing so a file modified meanwhile is hashed again next time
+            _update_sha1_cache(
+                cache_dir, {md5s[i]: [sha1s[i]] + stats[i] for i in misses}
+            )
+    return sha1s
+
+
+def gen_filesha1(
+    df: pd.DataFrame, dir_name: str, cache_dir: typing.Union[str, None] = None
+) -> pd.DataFrame:
     """Generates filesha1 for each file
 
     Args:
@@ -122,18 +273,18 @@ def gen_filesha1(df: pd.DataFrame, dir_name: str) -> pd.DataFrame:
             the dvc file records
         dir_name (str):
             the root directory that contains all the files
+        cache_dir (str):
+            DVC cache dir. If given, the md5 column is used to look up
+            hashes computed in previous runs.
 
     Returns:
         the frame with filesha1 column
     """
-
-    def digest(filepath: str) -> str:
-        hash = hashlib.sha1(usedforsecurity=False)
-        with open(os.path.join(dir_name, filepath), "rb") as f:
-            hash.update(f.read())
-        return hash.hexdigest()
-
-    df.loc[:, "filesha1"] = df.filepath.map(digest)
+    df.loc[:, "filesha1"] = files_sha1(
+        [os.path.join(dir_name, filepath) for filepath in df.filepath],
+        df.md5.tolist() if "md5" in df.columns else None,
+        cache_dir,
+    )
     return df
 
 
@@ -191,6 +342,6 @@ def files_meta_frame(
     return (
         pd.DataFrame.from_records(dvc_files)
         .rename(columns={"relpath": "filepath"})
-        .pipe(gen_filesha1, dir_name)
+        .pipe(gen_filesha1, dir_name, cache_dir)
         .pipe(set_fileid)
     )
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import dvc
+from lib.dvc import files_sha1
+
+
+class FilesSha1TestCase(unittest.TestCase):
+    def test_files_sha1(self):
+        contents = [b"", b"abc" * 1000, b"def"]
+        expected = [hashlib.sha1(b).hexdigest() for b in contents]
+        with tempfile.TemporaryDirectory() as dir:
+            filepaths = []
+            for i, b in enumerate(contents):
+                filepaths.append(os.path.join(dir, "%d.pdf" % i))
+                with open(filepaths[-1], "wb") as f:
+                    f.write(b)
+            md5s = [hashlib.md5(b).hexdigest() for b in contents]
+            cache_dir = os.path.join(dir, "cache")
+            os.mkdir(cache_dir)
+
+            with mock.patch.object(dvc, "HASH_CHUNK_SIZE", 7):
+                self.assertEqual(files_sha1(filepaths), expected)
+                self.assertEqual(files_sha1(filepaths, md5s, cache_dir), expected)
+            self.assertEqual(os.listdir(cache_dir), [dvc.SHA1_CACHE_FILENAME])
+
+            with mock.patch.object(dvc, "_file_sha1") as file_sha1_mock:
+                self.assertEqual(files_sha1(filepaths, md5s, cache_dir), expected)
+                file_sha1_mock.assert_not_called()
+
+            # a file that no longer matches its md5 is hashed again
+            with open(filepaths[2], "wb") as f:
+                f.write(b"changed")
+            expected[2] = hashlib.sha1(b"changed").hexdigest()
+            self.assertEqual(files_sha1(filepaths, md5s, cache_dir), expected)
+
+            # even if its size is the same
+            with open(filepaths[2], "wb") as f:
+                f.write(b"chanGED")
+            os.utime(filepaths[2], ns=(0, 1))
+            expected[2] = hashlib.sha1(b"chanGED").hexdigest()
+            self.assertEqual(files_sha1(filepaths, md5s, cache_dir), expected)
+
+            # or if it is replaced by another file with the same size and mtime
+            st = os.stat(filepaths[2])
+            with open(filepaths[2] + ".new", "wb") as f:
+                f.write(b"CHANGED")
+            os.utime(filepaths[2] + ".new", ns=(st.st_atime_ns, st.st_mtime_ns))
+            # the old file is kept around so that its inode is not reused
+            os.replace(filepaths[2], filepaths[2] + ".old")
+            os.replace(filepaths[2] + ".new", filepaths[2])
+            expected[2] = hashlib.sha1(b"CHANGED").hexdigest()
+            self.assertEqual(files_sha1(filepaths, md5s, cache_dir), expected)
+
+    def test_files_sha1_unwritable_cache_dir(self):
+        with tempfile.TemporaryDirectory() as dir:
+            filepath = os.path.join(dir, "0.pdf")
+            with open(filepath, "wb") as f:
+                f.write(b"abc")
+            cache_dir = os.path.join(dir, "cache")
+            with mock.patch.object(
+                dvc.tempfile, "mkstemp", side_effect=PermissionError
+            ):
+                self.assertEqual(
+                    files_sha1(
+                        [filepath], [hashlib.md5(b"abc").hexdigest()], cache_dir
+                    ),
+                    [hashlib.sha1(b"abc").hexdigest()],
+                )
+
+
+class DvcCacheDirTestCase(unittest.TestCase):
+    def tearDown(self):
+        dvc.dvc_cache_dir.cache_clear()
+
+    def test_dvc_cache_dir(self):
+        with tempfile.TemporaryDirectory() as dir:
+            root = os.path.join(dir, "repo")
+            global_dir = os.path.join(dir, "global")
+            os.makedirs(os.path.join(root, ".dvc"))
+            os.makedirs(global_dir)
+            with open(os.path.join(root, ".dvc", "config"), "w") as f:
+                f.write(
+                    "[core]\n    remote = gcs\n['remote \"gcs\"']\n    url = gs://b\n"
+                )
+            env = {
+                "DVC_SYSTEM_CONFIG_DIR": os.path.join(dir, "system"),
+                "DVC_GLOBAL_CONFIG_DIR": global_dir,
+            }
+            with mock.patch.dict(os.environ, env), mock.patch.object(
+                dvc, "_root_dir", return_value=dvc.pathlib.Path(root)
+            ):
+                self.assertEqual(
+                    dvc.dvc_cache_dir(), os.path.join(root, ".dvc", "cache")
+                )
+
+                with open(os.path.join(global_dir, "config"), "w") as f:
+                    f.write("[cache]\n    dir = ../shared_cache\n")
+                # the result is kept for the lifetime of the process
+                self.assertEqual(
+                    dvc.dvc_cache_dir(), os.path.join(root, ".dvc", "cache")
+                )
+                dvc.dvc_cache_dir.cache_clear()
+                self.assertEqual(dvc.dvc_cache_dir(), os.path.join(dir, "shared_cache"))
+
+                with open(os.path.join(root, ".dvc", "config.local"), "w") as f:
+                    f.write("[cache]\n    dir = local_cache\n")
+                dvc.dvc_cache_dir.cache_clear()
+                self.assertEqual(
+                    dvc.dvc_cache_dir(), os.path.join(root, ".dvc", "local_cache")
+                )
+
+
+class OpenDvcObjectFromCacheTestCase(unittest.TestCase):
+    def test_open_dvc_object_from_cache(self):
+        md5 = "0123456789abcdef0123456789abcdef.dir"
+        files = [{"md5": "a" * 32, "relpath": "a.pdf"}]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.makedirs(os.path.join(cache_dir, md5[:2]))
+            with open(os.path.join(cache_dir, md5[:2], md5[2:]), "w") as f:
+                json.dump(files, f)
+
+            objs = dvc.open_dvc_object_from_cache(cache_dir, md5)
+            self.assertEqual(objs, files)
+            objs[0]["relpath"] = "b.pdf"
+            with mock.patch("builtins.open") as open_mock:
+                self.assertEqual(dvc.open_dvc_object_from_cache(cache_dir, md5), files)
+                open_mock.assert_not_called()
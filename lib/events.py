@@ -5,7 +5,7 @@ import pandas as pd
 from pandas.api.types import CategoricalDtype
 
 from lib.clean import clean_date, clean_datetime, float_to_int_str
-from lib.uid import ensure_uid_unique, gen_uid_from_dict
+from lib.uid import ensure_uid_unique, gen_uid, gen_uid_from_dict
 from lib.exceptions import (
     InvalidEventKindException,
     InvalidEventDateException,
@@ -123,7 +123,9 @@ class Builder(object):
 
     def __init__(self):
         self._records = []
+        self._frames = []
         self._record_dict = dict()
+        self._unindexed_frame_ind = 0
         self._merge_cols = dict()
 
     def set_merge_cols(self, event_kind: str, merge_cols: list[str]):
@@ -247,8 +249,9 @@ class Builder(object):
         kwargs["event_uid"] = gen_uid_from_dict(
             kwargs, ["kind", "year", "month", "day", "time"] + id_cols
         )
+        self._index_frames()
         if warn_duplications and kwargs["event_uid"] in self._record_dict:
-            old_rec = self._record_dict[kwargs["event_uid"]]
+            old_rec = self._get_record(kwargs["event_uid"])
             for k, v in old_rec.items():
                 if v != kwargs[k]:
                     print(
@@ -260,6 +263,30 @@ class Builder(object):
             self._records.append(kwargs)
             self._record_dict[kwargs["event_uid"]] = kwargs
 
+    def _index_frames(self):
+        """Adds events collected by columnar extraction to the event_uid index.
+
+        Frames are indexed lazily and in the order they were collected so that the
+        index always points to the latest event with a given event_uid, just like
+        when events are appended one by one.
+        """
+        for frame_ind in range(self._unindexed_frame_ind, len(self._frames)):
+            for pos, eid in enumerate(self._frames[frame_ind].event_uid.values):
+                self._record_dict[eid] = (frame_ind, pos)
+        self._unindexed_frame_ind = len(self._frames)
+
+    def _get_record(self, event_uid: str) -> dict:
+        rec = self._record_dict[event_uid]
+        if type(rec) is dict:
+            return rec
+        frame_ind, pos = rec
+        rec = self._frames[frame_ind].iloc[pos].to_dict()
+        if "salary_freq" in rec and (
+            "salary" not in rec or pd.isnull(rec["salary"]) or rec["salary"] == ""
+        ):
+            del rec["salary_freq"]
+        return rec
+
     def _assign_kwargs_func(self, cols, kwargs_funcs, flatten_date_cols, kind, obj):
         if "parse_date" in obj:
             col = "%s_date" % obj["prefix"]
@@ -297,6 +324,7 @@ class Builder(object):
         event_dict: dict,
         id_cols: list[str],
         warn_duplications=False,
+        columnar=True,
     ) -> None:
         """Extract event records from a DataFrame.
 
@@ -314,6 +342,11 @@ class Builder(object):
         - id_cols: Overwrite `id_cols` for this event kind.
         - merge_cols: list of columns to merge duplicated events. See `set_merge_cols` to learn more.
 
+        By default events are extracted column-wise: each event kind is filtered, projected, date-parsed
+        and hashed as whole columns instead of row by row. The resulting frame is identical to what
+        appending each event with `append_record` would produce. When `warn_duplications` is True, events
+        are always appended row by row because each one must be compared with previously collected events.
+
         Args:
             df (pd.DataFrame):
                 the frame to extract events from
@@ -328,6 +361,9 @@ class Builder(object):
                 list of columns to generate event_uid from (in addition to ['kind', 'year', 'month', 'day', 'time'])
             warn_duplications (bool):
                 if even duplications are detected, print a warning but don't add the event.
+            columnar (bool):
+                extract events with whole-column operations. Set to False to append events
+                row by row. Defaults to True.
 
         Returns:
             no value
@@ -340,15 +376,14 @@ class Builder(object):
             if "merge_cols" in obj:
                 self.set_merge_cols(kind, obj["merge_cols"])
 
+        if columnar and not warn_duplications:
+            self._extract_events_by_column(df, event_dict, id_cols, flatten_date_cols)
+            return
+
         for _, row in df.iterrows():
             common_fields = row.drop(flatten_date_cols).to_dict()
             for kind, obj in event_dict.items():
-                if "parse_date" in obj:
-                    anchor_col = "%s_date" % obj["prefix"]
-                elif "parse_datetime" in obj:
-                    anchor_col = "%s_datetime" % obj["prefix"]
-                else:
-                    anchor_col = "%s_year" % obj["prefix"]
+                anchor_col = self._anchor_col(obj)
                 if row[anchor_col] == "" or pd.isnull(row[anchor_col]):
                     continue
                 if "keep" in obj:
@@ -374,21 +409,188 @@ class Builder(object):
                     **fields,
                 )
 
+    def _anchor_col(self, obj: dict) -> str:
+        if "parse_date" in obj:
+            return "%s_date" % obj["prefix"]
+        if "parse_datetime" in obj:
+            return "%s_datetime" % obj["prefix"]
+        return "%s_year" % obj["prefix"]
+
+    def _parse_date_column(
+        self, raw_dates: pd.Series, parse_func, n_cols: int, ignore_bad_date: bool
+    ) -> pd.DataFrame:
+        """Parses each distinct raw date once and broadcasts the result.
+
+        Rows whose date can't be parsed get None in every column when ignore_bad_date
+        is True, otherwise the ValueError is raised.
+        """
+        parsed = dict()
+        for val in raw_dates.unique():
+            try:
+                parsed[val] = parse_func(val)
+            except ValueError:
+                if not ignore_bad_date:
+                    raise
+                parsed[val] = None
+        return pd.DataFrame(
+            [parsed[val] or (None,) * n_cols for val in raw_dates.values],
+            index=raw_dates.index,
+            dtype=object,
+        )
+
+    def _date_fields(
+        self, frame: pd.DataFrame, obj: dict, ignore_bad_date: bool
+    ) -> list[tuple[str, pd.Series]]:
+        """Returns event date columns of a single event kind as (name, column) pairs"""
+        if "parse_date" in obj:
+            raw_dates = frame["%s_date" % obj["prefix"]]
+            if obj["parse_date"] is True:
+                parse_func = clean_date
+            else:
+                strptime_format = obj["parse_date"]
+
+                def parse_func(val):
+                    dt = datetime.strptime(val, strptime_format)
+                    return dt.year, dt.month, dt.day
+
+            names = ["year", "month", "day"]
+        elif "parse_datetime" in obj:
+            raw_dates = frame["%s_datetime" % obj["prefix"]]
+            if obj["parse_datetime"] is True:
+                parse_func = clean_datetime
+            else:
+                strptime_format = obj["parse_datetime"]
+
+                def parse_func(val):
+                    dt = datetime.strptime(val, strptime_format)
+                    return dt.year, dt.month, dt.day, dt.strftime("%H:%M")
+
+            names = ["year", "month", "day", "time"]
+        else:
+            return [
+                (event_col, frame[col])
+                for event_col in ["year", "month", "day", "time", "raw_date"]
+                for col in ["%s_%s" % (obj["prefix"], event_col)]
+                if col in frame.columns
+            ]
+        dates = self._parse_date_column(
+            raw_dates, parse_func, len(names), ignore_bad_date
+        )
+        return [(name, dates[i]) for i, name in enumerate(names)] + [
+            ("raw_date", raw_dates)
+        ]
+
+    def _extract_events_by_column(
+        self,
+        df: pd.DataFrame,
+        event_dict: dict,
+        id_cols: list[str],
+        flatten_date_cols: list[str],
+    ) -> None:
+        if df.shape[0] == 0:
+            return
+        # cells are taken from the interleaved values just like with df.iterrows()
+        # so that event_uid is generated from the exact same strings
+        values = pd.DataFrame(df.values, columns=df.columns).astype(object)
+        common_cols = values.drop(columns=flatten_date_cols).columns.to_list()
+        for kind, obj in event_dict.items():
+            ignore_bad_date = obj.get("ignore_bad_date", False)
+            anchor = values[self._anchor_col(obj)]
+            frame = values.loc[~(anchor.isna() | (anchor == ""))]
+            if frame.shape[0] == 0:
+                continue
+            if kind not in event_cat_type.categories:
+                raise InvalidEventKindException(kind)
+            if "keep" in obj:
+                fields = frame[[col for col in common_cols if col in obj["keep"]]]
+            elif "drop" in obj:
+                fields = frame[[col for col in common_cols if col not in obj["drop"]]]
+            else:
+                fields = frame[common_cols]
+            fields = fields.copy()
+            date_fields = self._date_fields(frame, obj, ignore_bad_date)
+            # append_record sets kind before parsing a date but after copying
+            # date columns, keep the same column order
+            parses_date = "parse_date" in obj or "parse_datetime" in obj
+            if parses_date:
+                fields.loc[:, "kind"] = kind
+            for name, col in date_fields:
+                fields.loc[:, name] = col
+            if not parses_date:
+                fields.loc[:, "kind"] = kind
+
+            if "salary_freq" in fields.columns:
+                if "salary" in fields.columns:
+                    no_salary = fields.salary.isna() | (fields.salary == "")
+                else:
+                    no_salary = pd.Series(True, index=fields.index)
+                invalid = ~no_salary & ~fields.salary_freq.isin(
+                    salary.cat_type.categories
+                )
+                if invalid.any():
+                    raise InvalidSalaryFreqException(
+                        fields.loc[invalid, "salary_freq"].iloc[0]
+                    )
+                # salary_freq is discarded from events without salary
+                fields.loc[no_salary, "salary_freq"] = None
+            else:
+                no_salary = None
+
+            if "year" in fields.columns:
+                bad_date = fields.year.isna() | (fields.year == "")
+            else:
+                bad_date = pd.Series(True, index=fields.index)
+            if bad_date.any():
+                if not ignore_bad_date:
+                    kwargs = fields.loc[bad_date].iloc[0].to_dict()
+                    raise InvalidEventDateException(
+                        "year column cannot be empty:\n\t%s" % kwargs
+                    )
+                fields = fields.loc[~bad_date]
+                if no_salary is not None:
+                    no_salary = no_salary.loc[~bad_date]
+                if fields.shape[0] == 0:
+                    continue
+
+            uid_keys = ["kind", "year", "month", "day", "time"] + (
+                id_cols if "id_cols" not in obj else obj["id_cols"]
+            )
+            key_cols = []
+            for key in uid_keys:
+                if key not in fields.columns:
+                    key_cols.append(pd.Series("", index=fields.index))
+                elif key == "salary_freq" and no_salary is not None:
+                    key_cols.append(fields[key].mask(no_salary, ""))
+                else:
+                    key_cols.append(fields[key])
+            keys = pd.concat(key_cols, axis=1, keys=range(len(key_cols)))
+            fields.loc[:, "event_uid"] = gen_uid(
+                keys, list(keys.columns), "event_uid"
+            ).event_uid
+            if no_salary is not None and no_salary.all():
+                fields = fields.drop(columns=["salary_freq"])
+            self._frames.append(fields.reset_index(drop=True))
+
     def _deduplicate_events_with_merge_cols(self, df: pd.DataFrame) -> pd.DataFrame:
         for kind, cols in self._merge_cols.items():
-            for eid, rows in df.loc[df.kind == kind].groupby("event_uid"):
-                if not isinstance(rows, pd.DataFrame) or len(rows) < 2:
-                    continue
-                non_empty_vals = (
-                    rows.sort_values(cols, ascending=False, na_position="last")
-                    .reset_index(drop=True)
-                    .loc[0, cols]
-                    .to_list()
+            rows = df.loc[df.kind == kind]
+            rows = rows.loc[
+                rows.event_uid.notna() & rows.event_uid.duplicated(keep=False)
+            ]
+            if len(rows) == 0:
+                continue
+            for col in cols:
+                # fill empty cells with the first non-empty value of their
+                # event or with "" if their event has no such value
+                blank = rows[col] == ""
+                merged = rows[col].mask(blank).groupby(rows.event_uid).first()
+                merged = merged.mask(
+                    merged.isna() & blank.groupby(rows.event_uid).any(), ""
                 )
-                for i, col in enumerate(cols):
-                    df.loc[
-                        (df.event_uid == eid) & (df[col].isna() | (df[col] == "")), col
-                    ] = non_empty_vals[i]
+                empty = (df[col].isna() | (df[col] == "")) & df.event_uid.isin(
+                    merged.index
+                )
+                df.loc[empty, col] = df.event_uid[empty].map(merged)
         return df.drop_duplicates()
 
     def to_frame(self, output_duplicated_events: bool = False) -> pd.DataFrame:
@@ -408,9 +610,16 @@ class Builder(object):
             NonUniqueUIDException:
                 event_uid is not unique.
         """
-        df = pd.DataFrame.from_records(self._records).pipe(
-            float_to_int_str, ["year", "month", "day"], True
-        )
+        if len(self._frames) == 0:
+            df = pd.DataFrame.from_records(self._records)
+        else:
+            # keep every cell as is until all events are together so that column
+            # dtypes are inferred exactly like DataFrame.from_records would
+            df = pd.concat(
+                [pd.DataFrame(self._records, dtype=object)] + self._frames,
+                ignore_index=True,
+            ).infer_objects()
+        df = df.pipe(float_to_int_str, ["year", "month", "day"], True)
         df.loc[:, "kind"] = df.kind.astype(event_cat_type)
         if "salary_freq" in df.columns:
             df.loc[:, "salary_freq"] = df.salary_freq.astype(salary.cat_type)
@@ -420,6 +629,41 @@ class Builder(object):
         return df
 
 
+def discard_events_occur_more_than_once_every(
+    df: pd.DataFrame, kind: str, groupby: list[str], days: int
+) -> pd.DataFrame:
+    """Discards events that occur more frequent than once every given days.
+
+    Events of the given kind are sorted by date within each group. When an
+    event occurs within the given number of days after the previous event
+    of its group, the previous event is discarded. Events without a valid
+    date are ignored and so are events with missing groupby values. Events
+    on the same date are ordered as they appear in the frame.
+
+    Args:
+        df (pd.DataFrame):
+            the frame to process
+        kind (str):
+            event kind to filter
+        groupby (list of str):
+            list of columns to group by
+        days (int):
+            the minimum number of days between events
+
+    Returns:
+        the processed frame
+    """
+    events = df.loc[df.kind == kind, groupby + ["event_uid"]].assign(
+        date=combine_date_columns(df.loc[df.kind == kind], "year", "month", "day")
+    )
+    events = events.loc[events[groupby].notna().all(axis=1) & events.date.notna()]
+    events = events.sort_values(groupby + ["date"], kind="stable")
+    next_diff = events.groupby(groupby, sort=False).date.diff().shift(-1)
+    event_uids = events.event_uid[next_diff <= timedelta(days=days)]
+    df = df.loc[~df.event_uid.isin(event_uids)]
+    return df.reset_index(drop=True)
+
+
 def discard_events_occur_more_than_once_every_30_days(
     df: pd.DataFrame, kind: str, groupby: list[str]
 ) -> pd.DataFrame:
@@ -436,22 +680,4 @@ def discard_events_occur_more_than_once_every_30_days(
     Returns:
         the processed frame
     """
-    df.loc[:, "date"] = combine_date_columns(df, "year", "month", "day")
-    event_uids = []
-    for _, frame in df[df.kind == kind].groupby(groupby):
-        if frame.shape[0] == 1:
-            continue
-        frame = frame.sort_values(["date"])
-        prev_date = None
-        prev_event_uid = None
-        for _, row in frame.iterrows():
-            if pd.isnull(row.date):
-                continue
-            if prev_date is not None and (
-                prev_date == row.date or prev_date + timedelta(days=30) >= row.date
-            ):
-                event_uids.append(prev_event_uid)
-            prev_date = row.date
-            prev_event_uid = row.event_uid
-    df = df.loc[~df.event_uid.isin(event_uids)]
-    return df.drop(columns=["date"]).reset_index(drop=True)
+    return discard_events_occur_more_than_once_every(df, kind, groupby, 30)
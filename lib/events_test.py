@@ -15,9 +15,11 @@ from events import (
     COMPLAINT_RECEIVE,
     OFFICER_PAY_EFFECTIVE,
     OFFICER_RANK,
+    discard_events_occur_more_than_once_every,
     discard_events_occur_more_than_once_every_30_days,
 )
 import salary
+from lib.exceptions import InvalidEventKindException
 
 
 class EventsBuilderTestCase(unittest.TestCase):
@@ -494,6 +496,57 @@ class EventsBuilderTestCase(unittest.TestCase):
             ),
         )
 
+    def test_extract_events_columnar(self):
+        df = pd.DataFrame(
+            [
+                ["1234", "Brusly PD", 2020, 5, 3, "6/15/2020", "43210.98", "yearly"],
+                ["1235", "Brusly PD", 2019, 10, 12, "", "", "yearly"],
+                ["1236", "Brusly PD", np.NaN, np.NaN, np.NaN, "Jun-15", np.NaN, ""],
+                ["1237", "Brusly PD", "", "", "", "3/28/20", "54321.76", "hourly"],
+            ],
+            columns=[
+                "uid",
+                "agency",
+                "hire_year",
+                "hire_month",
+                "hire_day",
+                "receive_date",
+                "salary",
+                "salary_freq",
+            ],
+        )
+        event_dict = {
+            OFFICER_HIRE: {"prefix": "hire", "keep": ["uid", "agency"]},
+            COMPLAINT_RECEIVE: {
+                "prefix": "receive",
+                "parse_date": True,
+                "ignore_bad_date": True,
+                "id_cols": ["uid", "salary_freq"],
+            },
+        }
+        frames, warnings = [], []
+        for columnar in [False, True]:
+            builder = Builder()
+            builder.extract_events(df.copy(), event_dict, ["uid"], columnar=columnar)
+            with redirect_stdout(StringIO()) as f:
+                builder.extract_events(
+                    df.copy(), event_dict, ["uid"], warn_duplications=True
+                )
+            warnings.append(f.getvalue())
+            frames.append(builder.to_frame())
+        self.assertEqual(warnings[0], warnings[1])
+        assert_frame_equal(frames[0], frames[1])
+        self.assertEqual(frames[1].shape[0], 4)
+
+        for columnar in [False, True]:
+            with self.assertRaises(InvalidEventKindException):
+                Builder().extract_events(
+                    df.copy(),
+                    {"officer_hired": {"prefix": "hire", "keep": ["uid", "agency"]}},
+                    ["uid"],
+                    columnar=columnar,
+                )
+
     def test_deduplicate_with_merge_cols(self):
         builder = Builder()
 
@@ -538,6 +591,36 @@ class EventsBuilderTestCase(unittest.TestCase):
             ),
         )
 
+    def test_deduplicate_events_with_merge_cols(self):
+        builder = Builder()
+        builder.set_merge_cols(OFFICER_HIRE, ["badge_no", "department_desc"])
+        columns = ["event_uid", "kind", "badge_no", "department_desc"]
+        df = pd.DataFrame(
+            [
+                ["e1", OFFICER_HIRE, "321", ""],
+                ["e1", OFFICER_HIRE, np.nan, "patrol"],
+                ["e1", OFFICER_HIRE, "", ""],
+                ["e2", OFFICER_HIRE, "", np.nan],
+                ["e2", OFFICER_HIRE, np.nan, np.nan],
+                ["e3", OFFICER_LEFT, "", ""],
+                ["e3", OFFICER_LEFT, "9", ""],
+            ],
+            columns=columns,
+        )
+        assert_frame_equal(
+            builder._deduplicate_events_with_merge_cols(df),
+            pd.DataFrame(
+                [
+                    ["e1", OFFICER_HIRE, "321", "patrol"],
+                    ["e2", OFFICER_HIRE, "", np.nan],
+                    ["e3", OFFICER_LEFT, "", ""],
+                    ["e3", OFFICER_LEFT, "9", ""],
+                ],
+                columns=columns,
+                index=[0, 3, 5, 6],
+            ),
+        )
+
     def test_warn_duplications(self):
         self.maxDiff = None
         builder = Builder()
@@ -678,3 +761,31 @@ class DiscardEventsOccurMoreThanOnceEvery30DaysTestCase(unittest.TestCase):
                 columns=columns,
             ),
         )
+
+    def test_discard_with_window(self):
+        columns = ["kind", "event_uid", "uid", "year", "month", "day"]
+        df = pd.DataFrame(
+            [
+                ["left", "01", "abc", "2000", "5", "4"],
+                ["left", "02", "abc", "2000", "4", "28"],
+                ["left", "03", "abc", "2000", "5", "24"],
+                ["left", "04", "abc", "", "5", "1"],
+                ["left", "05", "def", "2000", "5", "4"],
+                ["left", "06", "def", "2000", "5", "4"],
+                ["hire", "07", "abc", "2000", "4", "28"],
+            ],
+            columns=columns,
+        )
+        assert_frame_equal(
+            discard_events_occur_more_than_once_every(df, "left", ["uid"], 10),
+            pd.DataFrame(
+                [
+                    ["left", "01", "abc", "2000", "5", "4"],
+                    ["left", "03", "abc", "2000", "5", "24"],
+                    ["left", "04", "abc", "", "5", "1"],
+                    ["left", "06", "def", "2000", "5", "4"],
+                    ["hire", "07", "abc", "2000", "4", "28"],
+                ],
+                columns=columns,
+            ),
+        )
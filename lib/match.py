@@ -0,0 +1,525 @@
+import atexit
+import hashlib
+import heapq
+import itertools
+import operator
+import os
+import pathlib
+import pickle
+import tempfile
+import typing
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import datamatch
+from datamatch.matchers import MODE_DEDUP, MODE_MATCH
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+
+# memoized similarity scores of each cache file, shared by every similarity
+# object of the same kind in this process and saved when the process exits
+_score_memos = dict()
+
+# encoded items of the bucket maps built or loaded by this process, keyed by
+# content digest, see ColumnsIndex._key_ind_map
+_key_ind_maps = dict()
+
+# frames, scorer, filters and variator of the matcher whose buckets the
+# current worker process scores, see _init_shard_worker
+_shard_matcher = None
+
+
+def _cache_dir(cache_dir: str or None) -> pathlib.Path or None:
+    if cache_dir is None:
+        cache_dir = os.getenv("MATCH_CACHE_DIR", "")
+    if cache_dir == "":
+        return None
+    return pathlib.Path(cache_dir)
+
+
+def _write_pickle_atomic(path: pathlib.Path, obj: typing.Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _read_pickle(path: pathlib.Path) -> typing.Any or None:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _frame_digest(df: pd.DataFrame, cols: list[str]) -> str:
+    """Returns a hash of the index and the given columns of a frame, types included"""
+    frame = df[cols]
+    dtypes = [str(df.index.dtype)] + list(map(str, frame.dtypes))
+    hash = hashlib.sha1(usedforsecurity=False)
+    hash.update(repr((cols, len(df), dtypes)).encode("utf-8"))
+    hash.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    # object values are hashed by their string representation, which is the
+    # same for 1 and "1", so their types are hashed too
+    for values in [df.index.to_series()] + [frame[col] for col in frame.columns]:
+        if values.dtype == object:
+            types = values.map(lambda v: type(v).__name__)
+            hash.update(pd.util.hash_pandas_object(types, index=False).values.tobytes())
+    return hash.hexdigest()
+
+
+class _SharedNan(object):
+    """Stands for the np.nan singleton in persisted bucket keys"""
+
+
+def _encode_key(key: tuple) -> tuple:
+    return tuple(_SharedNan if v is np.nan else v for v in key)
+
+
+def _decode_key(key: tuple) -> tuple:
+    # every other NaN is replaced by a new object so that, like the NaN of a
+    # float column in datamatch, it never equals the key of another bucket
+    return tuple(
+        np.nan
+        if v is _SharedNan
+        else float("nan")
+        if isinstance(v, float) and v != v
+        else v
+        for v in key
+    )
+
+
+class ColumnsIndex(datamatch.ColumnsIndex):
+    """ColumnsIndex that builds each bucket map once
+
+    Buckets are computed with a single groupby instead of iterating over
+    rows and are persisted under the match cache directory, keyed by a hash
+    of the frame index and the indexed columns. Every match script indexing
+    the same reference table, such as the POST officers of an agency, reuses
+    the buckets until the table changes.
+
+    Buckets are only persisted if a cache directory is given or environment
+    variable "MATCH_CACHE_DIR" is set.
+    """
+
+    def __init__(
+        self,
+        cols: str or list[str],
+        ignore_key_error: bool = False,
+        index_elements: bool = False,
+        cache_dir: str or None = None,
+    ) -> None:
+        """Creates a new instance of ColumnsIndex
+
+        Args:
+            cols (str or list of str):
+                the columns to index
+            ignore_key_error (bool):
+                produce no bucket instead of raising a KeyError when a
+                column does not exist in the frame
+            index_elements (bool):
+                index each element of list values. Such buckets are not
+                cached.
+            cache_dir (str):
+                the directory to persist buckets in
+
+        Returns:
+            no value
+        """
+        super().__init__(cols, ignore_key_error, index_elements)
+        self._cache_dir = _cache_dir(cache_dir)
+
+    def _build_key_ind_map(self, df: pd.DataFrame) -> dict:
+        """Returns the same buckets as datamatch.ColumnsIndex
+
+        datamatch keys each row by the tuple of its values, so a missing
+        value only shares a bucket with the very same object. Missing values
+        of object columns are usually the np.nan singleton and share one
+        bucket, while each NaN of a float column is a new object and gets a
+        bucket of its own. Rows without missing values are grouped with a
+        single groupby and the keys of the other rows are built as datamatch
+        does.
+        """
+        missing = df[self._cols].isna().any(axis=1).to_numpy()
+        complete = df.loc[~missing]
+        labels = complete.index
+        result = dict()
+        for key, inds in complete.groupby(self._cols, sort=False).indices.items():
+            result[key if isinstance(key, tuple) else (key,)] = sorted(labels[inds])
+        rows = df.loc[missing, self._cols]
+        buckets = dict()
+        keys = zip(*[rows[col].to_numpy(dtype=object) for col in self._cols])
+        for key, label in zip(keys, rows.index):
+            buckets.setdefault(key, list()).append(label)
+        result.update((key, sorted(inds)) for key, inds in buckets.items())
+        return result
+
+    def _key_ind_map(self, df: pd.DataFrame) -> dict:
+        if self._index_elements:
+            return super()._key_ind_map(df)
+        if not set(self._cols).issubset(df.columns):
+            if self._ignore_key_error:
+                return dict()
+            raise KeyError(list(set(self._cols).difference(df.columns)))
+        if len(df) == 0:
+            return dict()
+
+        digest = _frame_digest(df, self._cols)
+        items = _key_ind_maps.get(digest)
+        path = (
+            None
+            if self._cache_dir is None
+            else self._cache_dir / "index" / ("%s.v2.pkl" % digest)
+        )
+        if items is None and path is not None:
+            items = _read_pickle(path)
+        if items is None:
+            items = [
+                (_encode_key(key), inds)
+                for key, inds in self._build_key_ind_map(df).items()
+            ]
+            if path is not None:
+                _write_pickle_atomic(path, items)
+        _key_ind_maps[digest] = items
+        # keys are decoded on every call so that NaN keys of two frames with
+        # the same content do not match
+        return {_decode_key(key): inds for key, inds in items}
+
+
+class _ScoreMemo(object):
+    """Similarity scores of value pairs, persisted to a directory of segments
+
+    Each save writes the scores computed since the last save to a new
+    segment file, so processes never rewrite each other's files and no
+    score is lost when match scripts run concurrently. Once there are too
+    many segments or scores, the next save replaces the segments it loaded
+    with a single one. Scores above max_scores are evicted oldest first,
+    down to half of max_scores so that compactions stay rare.
+    """
+
+    def __init__(
+        self,
+        dir: pathlib.Path or None,
+        max_segments: int = 16,
+        max_scores: int = 5_000_000,
+    ) -> None:
+        self._dir = dir
+        self._max_segments = max_segments
+        self._max_scores = max_scores
+        self.scores = dict()
+        self._new = dict()
+        # segments whose scores are in self.scores
+        self._segments = []
+        if dir is None or not dir.exists():
+            return
+        files = []
+        for path in dir.glob("*.pkl"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        for _, path in sorted(files):
+            scores = _read_pickle(path)
+            if scores is not None:
+                self.scores.update(scores)
+                self._segments.append(path)
+
+    def add(self, key: tuple, score: float) -> None:
+        self.scores[key] = score
+        self._new[key] = score
+
+    def save(self) -> None:
+        """Writes new scores to a segment of their own"""
+        if self._dir is None or len(self._new) == 0:
+            return
+        path = self._dir / ("%d-%s.pkl" % (os.getpid(), uuid.uuid4().hex))
+        if (
+            len(self._segments) < self._max_segments
+            and len(self.scores) <= self._max_scores
+        ):
+            _write_pickle_atomic(path, self._new)
+            self._segments.append(path)
+        else:
+            if len(self.scores) > self._max_scores:
+                # dicts keep insertion order so the oldest scores are dropped
+                self.scores = dict(
+                    itertools.islice(
+                        self.scores.items(),
+                        len(self.scores) - self._max_scores // 2,
+                        None,
+                    )
+                )
+            _write_pickle_atomic(path, self.scores)
+            # other processes only ever remove segments they have read
+            for segment in self._segments:
+                segment.unlink(missing_ok=True)
+            self._segments = [path]
+        self._new = dict()
+
+
+def _score_memo(cache_dir: pathlib.Path or None, name: str) -> _ScoreMemo:
+    dir = None if cache_dir is None else cache_dir / "similarity" / name
+    if dir not in _score_memos:
+        _score_memos[dir] = _ScoreMemo(
+            dir,
+            max_scores=int(os.getenv("MATCH_CACHE_MAX_SCORES", "5000000")),
+        )
+    return _score_memos[dir]
+
+
+def save_similarity_scores() -> None:
+    """Saves the similarity scores computed by this process
+
+    This is called when the process exits, so match scripts only need to
+    call it to persist scores early.
+
+    Returns:
+        no value
+    """
+    for memo in _score_memos.values():
+        memo.save()
+
+
+atexit.register(save_similarity_scores)
+
+
+class JaroWinklerSimilarity(datamatch.JaroWinklerSimilarity):
+    """JaroWinklerSimilarity that memoizes the score of each pair of values
+
+    Scores are shared with every other JaroWinklerSimilarity of the same
+    prefix weight and persisted under the match cache directory, so a pair
+    of names is only ever scored once across all match scripts.
+
+    Scores are only persisted if a cache directory is given or environment
+    variable "MATCH_CACHE_DIR" is set, otherwise they are kept in memory.
+    """
+
+    def __init__(self, prefix_weight: float = 0.1, cache_dir: str or None = None):
+        """Creates a new instance of JaroWinklerSimilarity
+
+        Args:
+            prefix_weight (float):
+                the extra weight given to common prefixes
+            cache_dir (str):
+                the directory to persist scores in
+
+        Returns:
+            no value
+        """
+        super().__init__(prefix_weight)
+        self._memo = _score_memo(
+            _cache_dir(cache_dir), "jaro_winkler_%s" % repr(prefix_weight)
+        )
+
+    def sim(self, a: str, b: str) -> float:
+        key = (a, b)
+        score = self._memo.scores.get(key)
+        if score is None:
+            score = super().sim(a, b)
+            self._memo.add(key, score)
+        return score
+
+
+def _score_bucket(
+    rows_a: pd.DataFrame,
+    rows_b: pd.DataFrame or None,
+    scorer: datamatch.scorers.BaseScorer,
+    filters: list[datamatch.filters.BaseFilter],
+    variator: datamatch.variators.Variator,
+) -> list[tuple]:
+    """Scores the pairs of a bucket the way ThresholdMatcher does"""
+    if rows_b is None:
+        pairs = itertools.combinations(rows_a.iterrows(), 2)
+    else:
+        pairs = itertools.product(rows_a.iterrows(), rows_b.iterrows())
+    result = []
+    for (idx_a, rec_a), (idx_b, rec_b) in pairs:
+        if not all(f.valid(rec_a, rec_b) for f in filters):
+            continue
+        sim = max(
+            scorer.score(ser_a, ser_b)
+            for ser_a, ser_b in itertools.product(
+                variator.variations(rec_a), variator.variations(rec_b)
+            )
+        )
+        result.append((sim, idx_a, idx_b))
+    return result
+
+
+def _init_shard_worker(
+    dfa: pd.DataFrame,
+    dfb: pd.DataFrame or None,
+    scorer: datamatch.scorers.BaseScorer,
+    filters: list[datamatch.filters.BaseFilter],
+    variator: datamatch.variators.Variator,
+) -> None:
+    global _shard_matcher
+    _shard_matcher = (dfa, dfb, scorer, filters, variator)
+
+
+def _score_shard(buckets: list[tuple]) -> list[tuple[int, list[tuple]]]:
+    """Scores (bucket number, row indices of dfa, row indices of dfb) buckets"""
+    dfa, dfb, scorer, filters, variator = _shard_matcher
+    return [
+        (
+            bucket_no,
+            _score_bucket(
+                dfa.loc[inds_a],
+                None if dfb is None else dfb.loc[inds_b],
+                scorer,
+                filters,
+                variator,
+            ),
+        )
+        for bucket_no, inds_a, inds_b in buckets
+    ]
+
+
+class ParallelThresholdMatcher(datamatch.ThresholdMatcher):
+    """ThresholdMatcher that scores its buckets across a process pool
+
+    Buckets are produced by the index like ThresholdMatcher does and dealt
+    to shards of roughly equal numbers of pairs. Each worker scores whole
+    buckets, so every pair is scored as many times and with the same
+    records as in ThresholdMatcher. Scores are merged in the order of the
+    bucket keys regardless of which shard finishes first, so the pairs and
+    the clusters built from them are the same on every run.
+
+    The scorer, filters and variator are sent to each worker once, so they
+    must be picklable unless worker processes are forked.
+    """
+
+    def __init__(
+        self,
+        index: datamatch.indices.BaseIndex,
+        scorer: dict or datamatch.scorers.BaseScorer,
+        dfa: pd.DataFrame,
+        dfb: pd.DataFrame or None = None,
+        variator: datamatch.variators.Variator or None = None,
+        filters: list[datamatch.filters.BaseFilter] = [],
+        show_progress: bool = False,
+        processes: int or None = None,
+        shards_per_process: int = 4,
+    ) -> None:
+        """Creates a new instance of ParallelThresholdMatcher
+
+        Args:
+            index (BaseIndex):
+                the index to divide the dataset into buckets
+            scorer (dict or BaseScorer):
+                the scorer of each pair, a dict is scored with SimSumScorer
+            dfa (pd.DataFrame):
+                the left dataset, or the dataset to deduplicate
+            dfb (pd.DataFrame):
+                the right dataset. Defaults to None which deduplicates dfa.
+            variator (Variator):
+                the variator to use
+            filters (list of BaseFilter):
+                the filters to discard pairs with
+            show_progress (bool):
+                show a progress bar of scored pairs
+            processes (int):
+                number of worker processes. Defaults to the MATCH_PROCESSES
+                environment variable or the number of CPUs. With 1 process,
+                buckets are scored in this process.
+            shards_per_process (int):
+                number of shards dealt to each process. More shards even
+                out buckets of very different sizes.
+
+        Returns:
+            no value
+        """
+        if processes is None:
+            processes = int(os.getenv("MATCH_PROCESSES", "0")) or os.cpu_count()
+        self._index = index
+        self._processes = processes
+        self._shards_per_process = shards_per_process
+        super().__init__(index, scorer, dfa, dfb, variator, filters, show_progress)
+
+    def _buckets(self) -> list[tuple]:
+        """Returns (row indices of dfa, row indices of dfb) of each bucket
+
+        Buckets are sorted by key so that they come in the same order on
+        every run.
+        """
+        key_inds_a = self._index._key_ind_map(self._pairer.frame_a)
+        if self._mode == MODE_DEDUP:
+            return [
+                (key_inds_a[key], None)
+                for key in sorted(key_inds_a, key=repr)
+                if len(key_inds_a[key]) > 1
+            ]
+        key_inds_b = self._index._key_ind_map(self._pairer.frame_b)
+        return [
+            (key_inds_a[key], key_inds_b[key])
+            for key in sorted(set(key_inds_a).intersection(key_inds_b), key=repr)
+        ]
+
+    def _bucket_size(self, bucket: tuple) -> int:
+        inds_a, inds_b = bucket
+        if self._mode == MODE_DEDUP:
+            return len(inds_a) * (len(inds_a) - 1) // 2
+        return len(inds_a) * len(inds_b)
+
+    def _shards(self, sizes: list[int], n_shards: int) -> list[list[int]]:
+        """Deals bucket numbers to shards, largest bucket to the least loaded shard"""
+        shards = [[] for _ in range(n_shards)]
+        loads = [(0, shard_no) for shard_no in range(n_shards)]
+        for bucket_no in sorted(range(len(sizes)), key=lambda no: -sizes[no]):
+            load, shard_no = heapq.heappop(loads)
+            shards[shard_no].append(bucket_no)
+            heapq.heappush(loads, (load + sizes[bucket_no], shard_no))
+        return [shard for shard in shards if len(shard) > 0]
+
+    def _score_all_pairs(self):
+        """Calculate similarity value for all pairs of records."""
+        dfa = self._pairer.frame_a
+        dfb = None if self._mode == MODE_DEDUP else self._pairer.frame_b
+        buckets = self._buckets()
+        sizes = [self._bucket_size(bucket) for bucket in buckets]
+        shards = [
+            [(bucket_no,) + buckets[bucket_no] for bucket_no in shard]
+            for shard in self._shards(
+                sizes, max(1, self._processes * self._shards_per_process)
+            )
+        ]
+        initargs = (dfa, dfb, self._scorer, self._filters, self._variator)
+        results = [None] * len(buckets)
+        with tqdm(
+            desc="scoring pairs", total=sum(sizes), disable=not self._show_progress
+        ) as progress:
+            if self._processes <= 1 or len(shards) <= 1:
+                _init_shard_worker(*initargs)
+                scored = map(_score_shard, shards)
+                executor = None
+            else:
+                executor = ProcessPoolExecutor(
+                    min(self._processes, len(shards)),
+                    initializer=_init_shard_worker,
+                    initargs=initargs,
+                )
+                scored = (
+                    fut.result()
+                    for fut in as_completed(
+                        [executor.submit(_score_shard, shard) for shard in shards]
+                    )
+                )
+            try:
+                for shard_result in scored:
+                    for bucket_no, pairs in shard_result:
+                        results[bucket_no] = pairs
+                        progress.update(sizes[bucket_no])
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+
+        self._pairs = sorted(
+            itertools.chain.from_iterable(results), key=operator.itemgetter(0)
+        )
+        # in dedup mode we can group more than two records therefore we're not dropping lesser matches
+        if self._mode == MODE_MATCH:
+            self._remove_lesser_matches()
+        self._scores = [t[0] for t in self._pairs]
@@ -0,0 +1,286 @@
+import os
+import pathlib
+import tempfile
+import unittest
+
+import datamatch
+import numpy as np
+import pandas as pd
+
+from lib import match
+from lib.match import (
+    ColumnsIndex,
+    JaroWinklerSimilarity,
+    ParallelThresholdMatcher,
+    save_similarity_scores,
+)
+
+
+def name_frames():
+    dfa = pd.DataFrame(
+        [
+            ["a1", "john", "smith"],
+            ["a2", "jon", "smyth"],
+            ["a3", "mary", "jones"],
+            ["a4", "marie", "jonas"],
+            ["a5", "", "lee"],
+        ],
+        columns=["uid", "first_name", "last_name"],
+    ).set_index("uid")
+    dfb = pd.DataFrame(
+        [
+            ["b1", "john", "smith"],
+            ["b2", "mary", "jones"],
+            ["b3", "maria", "jonas"],
+            ["b4", "", "leigh"],
+            ["b5", "kim", "lee"],
+        ],
+        columns=["uid", "first_name", "last_name"],
+    ).set_index("uid")
+    for df in [dfa, dfb]:
+        df.loc[:, "fc"] = df.first_name.str[:1]
+        df.loc[:, "lc"] = df.last_name.str[:1]
+    return dfa, dfb
+
+
+class MatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self._dir.name
+        match._key_ind_maps.clear()
+        match._score_memos.clear()
+
+    def tearDown(self):
+        match._key_ind_maps.clear()
+        match._score_memos.clear()
+        self._dir.cleanup()
+
+    def scores(self, matcher):
+        return sorted((round(score, 10), a, b) for score, a, b in matcher._pairs)
+
+    def test_same_pairs_as_datamatch(self):
+        dfa, dfb = name_frames()
+        for cols in ["fc", ["fc", "lc"]]:
+            expected = datamatch.ThresholdMatcher(
+                datamatch.ColumnsIndex(cols),
+                {
+                    "first_name": datamatch.JaroWinklerSimilarity(),
+                    "last_name": datamatch.JaroWinklerSimilarity(),
+                },
+                dfa,
+                dfb,
+            )
+            for _ in range(2):
+                matcher = datamatch.ThresholdMatcher(
+                    ColumnsIndex(cols, cache_dir=self.cache_dir),
+                    {
+                        "first_name": JaroWinklerSimilarity(cache_dir=self.cache_dir),
+                        "last_name": JaroWinklerSimilarity(cache_dir=self.cache_dir),
+                    },
+                    dfa,
+                    dfb,
+                )
+                self.assertEqual(self.scores(matcher), self.scores(expected))
+
+            expected = datamatch.ThresholdMatcher(
+                datamatch.ColumnsIndex(cols),
+                {"last_name": datamatch.JaroWinklerSimilarity()},
+                dfa,
+            )
+            matcher = datamatch.ThresholdMatcher(
+                ColumnsIndex(cols, cache_dir=self.cache_dir),
+                {"last_name": JaroWinklerSimilarity(cache_dir=self.cache_dir)},
+                dfa,
+            )
+            self.assertEqual(self.scores(matcher), self.scores(expected))
+
+    def test_index_persisted_by_content(self):
+        dfa, _ = name_frames()
+        index = ColumnsIndex(["fc", "lc"], cache_dir=self.cache_dir)
+        key_inds = index._key_ind_map(dfa)
+        self.assertEqual(
+            key_inds,
+            datamatch.ColumnsIndex(["fc", "lc"])._key_ind_map(dfa),
+        )
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, "index"))), 1)
+
+        match._key_ind_maps.clear()
+        self.assertEqual(
+            ColumnsIndex(["fc", "lc"], cache_dir=self.cache_dir)._key_ind_map(dfa),
+            key_inds,
+        )
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, "index"))), 1)
+
+        dfa.loc["a1", "fc"] = "k"
+        index._key_ind_map(dfa)
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, "index"))), 2)
+
+    def test_index_missing_values(self):
+        dfa = pd.DataFrame(
+            {"fc": ["a", np.nan, "b", np.nan]}, index=["x", "y", "z", "w"]
+        )
+        dfb = pd.DataFrame({"fc": [np.nan, "a"]}, index=["u", "v"])
+        index = ColumnsIndex("fc", cache_dir=self.cache_dir)
+        keys = index.keys(dfa).intersection(index.keys(dfb))
+        self.assertEqual(len(keys), 2)
+        match._key_ind_maps.clear()
+        index = ColumnsIndex("fc", cache_dir=self.cache_dir)
+        keys = index.keys(dfa).intersection(index.keys(dfb))
+        self.assertEqual(len(keys), 2)
+
+    def test_index_nan_keys_same_as_datamatch(self):
+        df = pd.DataFrame(
+            {
+                "yr": [2000, 2001, np.nan, 2002, np.nan, np.nan],
+                "name": ["a", "a", "a", np.nan, np.nan, None],
+            }
+        )
+        other = df.copy()
+        for cols in ["yr", ["yr"], "name", ["yr", "name"]]:
+            for frame in [df, df[["yr"]]] if cols == "yr" else [df]:
+                expected = datamatch.ColumnsIndex(cols)
+                for _ in range(2):
+                    match._key_ind_maps.clear()
+                    index = ColumnsIndex(cols, cache_dir=self.cache_dir)
+                    self.assertEqual(
+                        sorted(index._key_ind_map(frame).values()),
+                        sorted(expected._key_ind_map(frame).values()),
+                    )
+                    self.assertEqual(
+                        len(index.keys(frame).intersection(index.keys(other))),
+                        len(expected.keys(frame).intersection(expected.keys(other))),
+                    )
+        self.assertEqual(
+            sorted(ColumnsIndex("yr", cache_dir="")._key_ind_map(df).values()),
+            [[0], [1], [2], [3], [4], [5]],
+        )
+
+    def test_index_ignore_key_error(self):
+        dfa, _ = name_frames()
+        self.assertEqual(
+            ColumnsIndex("mc", ignore_key_error=True, cache_dir="")._key_ind_map(dfa),
+            dict(),
+        )
+        with self.assertRaises(KeyError):
+            ColumnsIndex("mc", cache_dir="")._key_ind_map(dfa)
+
+    def test_similarity_scores_persisted(self):
+        sim = JaroWinklerSimilarity(cache_dir=self.cache_dir)
+        score = sim.sim("john", "jon")
+        self.assertEqual(score, datamatch.JaroWinklerSimilarity().sim("john", "jon"))
+        save_similarity_scores()
+
+        match._score_memos.clear()
+        sim = JaroWinklerSimilarity(cache_dir=self.cache_dir)
+        self.assertEqual(sim._memo.scores, {("john", "jon"): score})
+        sim.sim("mary", "marie")
+
+        match._score_memos.clear()
+        other = JaroWinklerSimilarity(cache_dir=self.cache_dir)
+        other.sim("kim", "kimberly")
+        other._memo.save()
+        sim._memo.save()
+
+        match._score_memos.clear()
+        self.assertEqual(
+            set(JaroWinklerSimilarity(cache_dir=self.cache_dir)._memo.scores),
+            {("john", "jon"), ("mary", "marie"), ("kim", "kimberly")},
+        )
+
+    def test_similarity_scores_compacted(self):
+        dir = pathlib.Path(self.cache_dir) / "similarity"
+        pairs = [("a%d" % i, "b") for i in range(6)]
+        loaded = [[], pairs[:1], pairs[:2], pairs[:3], pairs[:4], pairs[3:5]]
+        for pair, expected in zip(pairs, loaded):
+            memo = match._ScoreMemo(dir, max_segments=3, max_scores=4)
+            self.assertEqual(sorted(memo.scores), expected)
+            memo.add(pair, 0.5)
+            memo.save()
+            self.assertLessEqual(len(os.listdir(dir)), 3)
+
+    def test_frame_digest_types(self):
+        df = pd.DataFrame({"a": [1, "x"], "b": [1, 2]}, index=[1, "y"])
+        digest = match._frame_digest(df, ["a", "b"])
+        for other in [
+            df.assign(a=["1", "x"]),
+            df.assign(b=[1.0, 2.0]),
+            df.set_axis(["1", "y"]),
+        ]:
+            self.assertNotEqual(match._frame_digest(other, ["a", "b"]), digest)
+        self.assertEqual(match._frame_digest(df.copy(), ["a", "b"]), digest)
+
+
+class ParallelThresholdMatcherTestCase(unittest.TestCase):
+    def test_dedup(self):
+        df = pd.DataFrame(
+            [
+                ["a1", "john", "smith", "x", 1, 2, 1.0],
+                ["a2", "jon", "smith", "y", 3, 4, 1.0],
+                ["a3", "john", "smyth", "z", 2, 5, np.nan],
+                ["a4", "mary", "jones", "x", 1, 2, 2.0],
+                ["a5", "marie", "jones", "y", 6, 7, 2.0],
+                ["a6", "maria", "jonas", "z", 8, 9, 2.0],
+                ["a7", "kim", "lee", "x", 1, 9, 3.0],
+            ],
+            columns=[
+                "uid",
+                "first_name",
+                "last_name",
+                "agency",
+                "min_timestamp",
+                "max_timestamp",
+                "history_id",
+            ],
+        ).set_index("uid")
+        df.loc[:, "fc"] = df.first_name.str[:1]
+
+        def matcher(cls, **kwargs):
+            return cls(
+                datamatch.MultiIndex(
+                    [
+                        datamatch.ColumnsIndex("fc"),
+                        datamatch.ColumnsIndex("history_id", ignore_key_error=True),
+                    ]
+                ),
+                {
+                    "first_name": datamatch.JaroWinklerSimilarity(),
+                    "last_name": datamatch.JaroWinklerSimilarity(),
+                },
+                df,
+                filters=[
+                    datamatch.DissimilarFilter("agency"),
+                    datamatch.NonOverlappingFilter("min_timestamp", "max_timestamp"),
+                ],
+                **kwargs,
+            )
+
+        expected = matcher(datamatch.ThresholdMatcher)
+        results = [
+            matcher(ParallelThresholdMatcher, processes=processes)
+            for processes in [1, 2, 3]
+        ]
+        for result in results:
+            self.assertEqual(sorted(result._pairs), sorted(expected._pairs))
+            self.assertEqual(result._pairs, results[0]._pairs)
+            self.assertEqual(
+                sorted(map(sorted, result.get_index_clusters_within_thresholds(0.8))),
+                sorted(map(sorted, expected.get_index_clusters_within_thresholds(0.8))),
+            )
+
+    def test_match(self):
+        dfa, dfb = name_frames()
+        scorer = {
+            "first_name": datamatch.JaroWinklerSimilarity(),
+            "last_name": datamatch.JaroWinklerSimilarity(),
+        }
+        expected = datamatch.ThresholdMatcher(
+            datamatch.ColumnsIndex("lc"), scorer, dfa, dfb
+        )
+        for processes in [1, 2]:
+            result = ParallelThresholdMatcher(
+                datamatch.ColumnsIndex("lc"), scorer, dfa, dfb, processes=processes
+            )
+            self.assertEqual(
+                sorted(result.get_index_pairs_within_thresholds(0)),
+                sorted(expected.get_index_pairs_within_thresholds(0)),
+            )
@@ -1,5 +1,14 @@
+import hashlib
 import json
+import math
+import os
 import random
+import tempfile
+import time
+import typing
+from collections import Counter
+from pathlib import Path
+
 import spacy
 from spacy.util import minibatch, compounding
 from spacy.training import Example
@@ -7,71 +16,362 @@ import pandas as pd
 import deba
 
 
-def train_spacy_model(df: pd.DataFrame, training_data: str) -> pd.DataFrame:
-    ###  import labeled_data that has been exported from doccano
-
-    labeled_data = []
-    with open(
-        training_data,
-        "r",
-    ) as read_file:
+def _read_training_data(training_data: str) -> typing.Iterator[tuple]:
+    """Streams (text, annotations) pairs from a JSONL file exported from doccano"""
+    with open(training_data, "r") as read_file:
         for line in read_file:
-            data = json.loads(line)
-            labeled_data.append(data)
-
-    TRAINING_DATA = []
-    for entry in labeled_data:
-        entities = []
-        for e in entry["label"]:
-            entities.append((e[0], e[1], e[2]))
-        spacy_entry = (entry["text"], {"entities": entities})
-        TRAINING_DATA.append(spacy_entry)
-
-    ### train model
+            if line.strip() == "":
+                continue
+            entry = json.loads(line)
+            yield entry["text"], {
+                "entities": [(e[0], e[1], e[2]) for e in entry["label"]]
+            }
+
+
+def train_spacy_model(
+    training_data: str,
+    n_iter: int = 500,
+    dev_fraction: float = 0.2,
+    patience: int = 10,
+    dropout: float = 0.2,
+    checkpoint_dir: str or None = None,
+    seed: int = 0,
+) -> spacy.language.Language:
+    """Trains a blank English NER model
+
+    Training examples are updated on in minibatches of growing size. A
+    dev_fraction of the examples is held out and the model is scored on it
+    after each epoch; training stops once the score has not improved for
+    patience epochs and the best model is returned. One line with the loss,
+    dev score and throughput is printed per epoch.
+
+    Args:
+        training_data (str):
+            path to a JSONL file exported from doccano, each line having a
+            "text" and a "label" list of [start, end, label]
+        n_iter (int):
+            the maximum number of epochs
+        dev_fraction (float):
+            fraction of examples held out for early stopping. No example is
+            held out if this leaves less than 1 example.
+        patience (int):
+            number of epochs without improvement before training stops
+        dropout (float):
+            dropout rate
+        checkpoint_dir (str):
+            if given, the best model is saved to this directory whenever
+            it improves
+        seed (int):
+            seed of the shuffling, split and model initialization
+
+    Returns:
+        the trained model
+
+    Raises:
+        ValueError:
+            there is no example to train on
+    """
     nlp = spacy.blank("en")
-    ner = nlp.create_pipe("ner")
-    nlp.add_pipe("ner")
-    ner.add_label("officer_name")
-    ner.add_label("officer_sex")
-    ner.add_label("agency")
-
-    optimizer = nlp.begin_training()
-    for itn in range(500):
-        random.shuffle(TRAINING_DATA)
+    ner = nlp.add_pipe("ner")
+    examples = []
+    for text, annotations in _read_training_data(training_data):
+        examples.append(Example.from_dict(nlp.make_doc(text), annotations))
+        for _, _, label in annotations["entities"]:
+            ner.add_label(label)
+
+    rng = random.Random(seed)
+    rng.shuffle(examples)
+    n_dev = int(len(examples) * dev_fraction)
+    dev_examples, train_examples = examples[:n_dev], examples[n_dev:]
+    if len(train_examples) == 0:
+        raise ValueError("no training example in %s" % training_data)
+
+    spacy.util.fix_random_seed(seed)
+    optimizer = nlp.initialize(lambda: train_examples)
+    best_score, best_model, stale_epochs = None, None, 0
+    for itn in range(n_iter):
+        rng.shuffle(train_examples)
         losses = {}
-        for batch in spacy.util.minibatch(
-            TRAINING_DATA, size=compounding(5.0, 2.0, 1.001)
-        ):
-            for text, annotations in batch:
-                doc = nlp.make_doc(text)
-                example = Example.from_dict(doc, annotations)
-                nlp.update([example], sgd=optimizer, losses=losses, drop=0.2)
-                print(losses)
-        entities = []
+        start = time.perf_counter()
+        for batch in minibatch(train_examples, size=compounding(4.0, 32.0, 1.001)):
+            nlp.update(batch, sgd=optimizer, losses=losses, drop=dropout)
+        speed = len(train_examples) / (time.perf_counter() - start)
+        if n_dev == 0:
+            print(
+                "epoch %d: loss %.3f, %.0f examples/sec"
+                % (itn, losses.get("ner", 0.0), speed)
+            )
+            continue
+
+        score = nlp.evaluate(dev_examples)["ents_f"] or 0.0
+        print(
+            "epoch %d: loss %.3f, dev ents_f %.3f, %.0f examples/sec"
+            % (itn, losses.get("ner", 0.0), score, speed)
+        )
+        if best_score is None or score > best_score:
+            best_score, best_model, stale_epochs = score, nlp.to_bytes(), 0
+            if checkpoint_dir is not None:
+                nlp.to_disk(checkpoint_dir)
+        else:
+            stale_epochs += 1
+            if stale_epochs >= patience:
+                break
+
+    if best_model is not None:
+        nlp.from_bytes(best_model)
+    elif checkpoint_dir is not None:
+        nlp.to_disk(checkpoint_dir)
     return nlp
 
 
-def apply_spacy_model(df: pd.DataFrame, spacy_model: str) -> pd.DataFrame:
+# pipeline components the ner component may depend on
+NER_COMPONENTS = ("tok2vec", "transformer", "ner")
+
+
+def _name_entities(labels: list, texts: list) -> dict:
+    """Maps entity names to entity texts
+
+    An entity is named after its label. If a label occurs n > 1 times, its
+    entities are named label_1 ... label_n and these names take the place
+    of the first occurrence of the label, while texts keep their order. So
+    the labels ["a", "b", "a"] name the texts ["x", "y", "z"] as
+    {"a_1": "x", "a_2": "y", "b": "z"}, like the original renaming loop did.
+    """
+    counts = Counter(labels)
+    names = []
+    for label in labels:
+        if counts[label] == 1:
+            names.append(label)
+        elif counts[label] > 1:
+            names.extend("%s_%d" % (label, num) for num in range(1, counts[label] + 1))
+            counts[label] = 0
+    return dict(zip(names, texts))
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def _file_stat(path: Path) -> tuple:
+    st = path.stat()
+    return path.as_posix(), st.st_size, st.st_mtime_ns
+
+
+# SHA1 hashes of model dirs keyed by the dir and the name, size and mtime
+# of each file in it, see _dir_sha1
+_dir_sha1s = dict()
+
+
+def _dir_sha1(dir: Path) -> str:
+    """Returns SHA1 hash of the names and content of all files in dir
+
+    Hashes are memoized until a file is added, removed or modified, so a
+    model is only read once per process.
+    """
+    paths = sorted(p for p in Path(dir).rglob("*") if p.is_file())
+    key = (Path(dir).resolve(), tuple(_file_stat(path) for path in paths))
+    if key in _dir_sha1s:
+        return _dir_sha1s[key]
+    hash = hashlib.sha1(usedforsecurity=False)
+    for path in paths:
+        hash.update(path.relative_to(dir).as_posix().encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hash.update(chunk)
+    _dir_sha1s[key] = hash.hexdigest()
+    return _dir_sha1s[key]
+
+
+class EntityCache(object):
+    """Persistent cache of the entities a model finds in pages
+
+    Entities are keyed by the SHA1 hash of the page text and stored as
+    (label, text) pairs in a JSON lines file named after the SHA1 hash of
+    the model directory, so they are only reused for the exact same text
+    and model. New entries are appended to the file.
+
+    The cache is kept under max_size bytes: files of the least recently
+    used other models are removed first, then the file of the current
+    model is rewritten with only the pages of the current run.
+    """
+
+    def __init__(
+        self, cache_dir: str, model_dir: Path, max_size: int = 1 << 30
+    ) -> None:
+        """Creates a new instance of EntityCache
+
+        Args:
+            cache_dir (str):
+                the directory to store cached entities in
+            model_dir (Path):
+                the directory the model was loaded from
+            max_size (int):
+                the size in bytes of the cache above which entities are
+                evicted. Defaults to 1GiB.
+
+        Returns:
+            no value
+        """
+        self._path = Path(cache_dir) / ("%s.jsonl" % _dir_sha1(model_dir))
+        self._max_size = max_size
+        self._entities = dict()
+        # keys of the pages of the current run
+        self._used = set()
+        self._evict_other_models()
+        try:
+            with open(self._path, "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        # mark as recently used for eviction
+        os.utime(self._path)
+        for line in lines:
+            try:
+                key, ents = json.loads(line)
+            except ValueError:
+                # last line of an interrupted write
+                continue
+            self._entities[key] = ents
+
+    def _evict_other_models(self) -> None:
+        files = []
+        for path in self._path.parent.glob("*.jsonl"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((path == self._path, st.st_mtime, st.st_size, path))
+        size = sum(file_size for _, _, file_size, _ in files)
+        for current, _, file_size, path in sorted(files):
+            if size <= self._max_size or current:
+                break
+            path.unlink(missing_ok=True)
+            size -= file_size
+
+    def get(self, key: str) -> list or None:
+        """Returns the (label, text) pairs found in the page with the given hash"""
+        self._used.add(key)
+        return self._entities.get(key)
+
+    def update(self, entities: dict) -> None:
+        """Stores (label, text) pairs by page hash"""
+        if len(entities) == 0:
+            return
+        self._entities.update(entities)
+        self._used.update(entities)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path, "a") as f:
+            f.write(
+                "".join(
+                    json.dumps([key, ents]) + "\n" for key, ents in entities.items()
+                )
+            )
+        if self._path.stat().st_size > self._max_size:
+            self._entities = {
+                key: ents for key, ents in self._entities.items() if key in self._used
+            }
+            fd, tmp_path = tempfile.mkstemp(dir=self._path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(
+                    "".join(
+                        json.dumps([key, ents]) + "\n"
+                        for key, ents in self._entities.items()
+                    )
+                )
+            os.replace(tmp_path, self._path)
+
+
+def _entity_cache(
+    nlp: spacy.language.Language, cache_dir: str or None
+) -> EntityCache or None:
+    if nlp.path is None:
+        return None
+    if cache_dir is None:
+        cache_dir = os.getenv("NER_CACHE_DIR", "")
+    if cache_dir == "":
+        return None
+    return EntityCache(
+        cache_dir,
+        nlp.path,
+        int(os.getenv("NER_CACHE_MAX_SIZE", str(1 << 30))),
+    )
+
+
+def apply_spacy_model(
+    df: pd.DataFrame,
+    spacy_model: spacy.language.Language,
+    batch_size: int = 64,
+    n_process: int or None = None,
+    cache_dir: str or None = None,
+) -> pd.DataFrame:
+    """Extracts named entities from the paragraphs column
+
+    Paragraphs are processed in batches with nlp.pipe, with every pipeline
+    component other than NER_COMPONENTS disabled. Each entity becomes a
+    column named as described in _name_entities, e.g. officer_name_1.
+
+    If the model was loaded from disk and a cache directory is set, the
+    entities of each page are cached in an EntityCache and the model only
+    runs on pages that were not seen with the same model before.
+
+    Args:
+        df (pd.DataFrame):
+            the frame with a paragraphs column
+        spacy_model (spacy.language.Language):
+            the loaded NER model
+        batch_size (int):
+            number of paragraphs processed at once
+        n_process (int):
+            number of processes. Defaults to the value of environment
+            variable "NER_PROCESSES" or the number of CPUs, and is never
+            more than the number of batches.
+        cache_dir (str):
+            the directory of the cache. Defaults to the value of environment
+            variable "NER_CACHE_DIR", the cache is disabled if neither is
+            set. The cache is not an output of any stage so it should live
+            outside of the data directory. It is kept under
+            "NER_CACHE_MAX_SIZE" bytes, 1GiB by default.
+
+    Returns:
+        the frame with entity columns prepended
+    """
     nlp = spacy_model
-    ### train model
-    entities = []
-    for row in df["paragraphs"].apply(nlp):
-        text = [text.text for text in row.ents]
-        labels = [labels.label_ for labels in row.ents]
-        ents = list(zip(labels, text))
-
-        tuples = [i[0] for i in ents]
-        counts = {key: tuples.count(key) for key in [i[0] for i in ents]}
-        for idx, key in enumerate(tuples):
-            if counts.get(key) and counts.get(key) > 1:
-                for num in range(counts[key]):
-                    if key + str(num + 1) not in tuples:
-                        tuples.remove(key)
-                        tuples.insert(idx + num, key + "_" + str(num + 1))
-
-        renamed_ents = dict(zip(tuples, [i[1] for i in ents]))
-        entities.append(renamed_ents)
+    texts = df["paragraphs"].tolist()
+    cache = _entity_cache(nlp, cache_dir)
+    if cache is None:
+        keys = list(range(len(texts)))
+        found = dict()
+    else:
+        keys = [_sha1(str(text)) for text in texts]
+        found = {key: cache.get(key) for key in set(keys)}
+    missing = dict(
+        (key, text) for key, text in zip(keys, texts) if found.get(key) is None
+    )
+
+    if n_process is None:
+        n_process = int(os.getenv("NER_PROCESSES", "0")) or os.cpu_count()
+    n_process = max(1, min(n_process, math.ceil(len(missing) / batch_size)))
+    disable = [name for name in nlp.pipe_names if name not in NER_COMPONENTS]
+    new = {
+        key: [[ent.label_, ent.text] for ent in doc.ents]
+        for key, doc in zip(
+            missing,
+            nlp.pipe(
+                missing.values(),
+                batch_size=batch_size,
+                n_process=n_process,
+                disable=disable,
+            ),
+        )
+    }
+    if cache is not None:
+        cache.update(new)
+    found.update(new)
 
+    entities = [
+        _name_entities([ent[0] for ent in found[key]], [ent[1] for ent in found[key]])
+        for key in keys
+    ]
     ner = pd.DataFrame(entities)
     df = pd.concat([ner, df], axis=1)
     return df
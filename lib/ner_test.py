@@ -0,0 +1,219 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+import spacy
+from spacy.language import Language
+from spacy.tokens import Span
+
+from lib import ner
+from lib.ner import _name_entities, apply_spacy_model, train_spacy_model
+
+
+@Language.component("ner_test_capitalized")
+def capitalized_entities(doc):
+    """Labels capitalized words with their lowercased text"""
+    doc.ents = [
+        Span(doc, tok.i, tok.i + 1, label=tok.lower_) for tok in doc if tok.is_title
+    ]
+    return doc
+
+
+processed_texts = []
+
+
+@Language.component("ner_test_recording")
+def recording(doc):
+    processed_texts.append(doc.text)
+    return doc
+
+
+@Language.component("ner_test_unused")
+def unused(doc):
+    raise AssertionError("unused components must be disabled")
+
+
+class NameEntitiesTestCase(unittest.TestCase):
+    def test_name_entities(self):
+        self.assertEqual(_name_entities([], []), {})
+        self.assertEqual(
+            _name_entities(["a", "b", "c"], ["x", "y", "z"]),
+            {"a": "x", "b": "y", "c": "z"},
+        )
+        self.assertEqual(
+            _name_entities(["a", "b", "a", "c", "b"], ["v", "w", "x", "y", "z"]),
+            {"a_1": "v", "a_2": "w", "b_1": "x", "b_2": "y", "c": "z"},
+        )
+
+
+class ApplySpacyModelTestCase(unittest.TestCase):
+    def test_apply_spacy_model(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("ner_test_capitalized", name="ner")
+        nlp.add_pipe("ner_test_unused")
+        df = pd.DataFrame(
+            {
+                "paragraphs": ["Alpha beta", "no entities", "Alpha Gamma Alpha"] * 3,
+                "pageno": list(range(9)),
+            }
+        )
+        expected = pd.DataFrame(
+            [
+                {"alpha": "Alpha"},
+                {},
+                {"alpha_1": "Alpha", "alpha_2": "Gamma", "gamma": "Alpha"},
+            ]
+            * 3
+        )
+        for n_process in [1, 2]:
+            result = apply_spacy_model(df, nlp, batch_size=2, n_process=n_process)
+            self.assertEqual(
+                result.columns.tolist(),
+                ["alpha", "alpha_1", "alpha_2", "gamma", "paragraphs", "pageno"],
+            )
+            pd.testing.assert_frame_equal(result[expected.columns], expected)
+            pd.testing.assert_frame_equal(result[df.columns], df)
+
+
+class EntityCacheTestCase(unittest.TestCase):
+    def test_apply_spacy_model_with_cache(self):
+        with tempfile.TemporaryDirectory() as dir:
+            model_dir = os.path.join(dir, "model")
+            nlp = spacy.blank("en")
+            nlp.add_pipe("ner_test_capitalized", name="ner")
+            nlp.add_pipe("ner_test_recording", name="tok2vec")
+            nlp.to_disk(model_dir)
+            nlp = spacy.load(model_dir)
+            cache_dir = os.path.join(dir, "cache")
+
+            def apply(paragraphs):
+                processed_texts.clear()
+                return apply_spacy_model(
+                    pd.DataFrame({"paragraphs": paragraphs}),
+                    nlp,
+                    n_process=1,
+                    cache_dir=cache_dir,
+                )
+
+            first = apply(["Alpha beta", "no entities", "Alpha beta"])
+            self.assertEqual(processed_texts, ["Alpha beta", "no entities"])
+            self.assertEqual(first.alpha.fillna("").tolist(), ["Alpha", "", "Alpha"])
+
+            second = apply(["Alpha beta", "Gamma", "no entities"])
+            self.assertEqual(processed_texts, ["Gamma"])
+            self.assertEqual(second.alpha.fillna("").tolist(), ["Alpha", "", ""])
+            self.assertEqual(second.gamma.fillna("").tolist(), ["", "Gamma", ""])
+
+            # entities found by another model are not reused
+            with open(os.path.join(model_dir, "meta.json"), "a") as f:
+                f.write(" ")
+            nlp = spacy.load(model_dir)
+            apply(["Alpha beta"])
+            self.assertEqual(processed_texts, ["Alpha beta"])
+
+    def test_cache_is_opt_in(self):
+        nlp = spacy.blank("en")
+        with tempfile.TemporaryDirectory() as dir:
+            nlp.to_disk(dir)
+            nlp = spacy.load(dir)
+            with mock.patch.dict(os.environ, {"NER_CACHE_DIR": ""}):
+                self.assertIsNone(ner._entity_cache(nlp, None))
+            with mock.patch.dict(os.environ, {"NER_CACHE_DIR": dir}):
+                self.assertIsNotNone(ner._entity_cache(nlp, None))
+
+    def test_cache_bounded(self):
+        with tempfile.TemporaryDirectory() as dir:
+            model_dir = os.path.join(dir, "model")
+            os.mkdir(model_dir)
+            cache_dir = os.path.join(dir, "cache")
+            os.mkdir(cache_dir)
+            other = os.path.join(cache_dir, "other.jsonl")
+            with open(other, "w") as f:
+                f.write(json.dumps(["k", []]) + "\n")
+            os.utime(other, (0, 0))
+
+            cache = ner.EntityCache(cache_dir, model_dir, max_size=100)
+            cache.update({"a": [["alpha", "Alpha"]]})
+            self.assertTrue(os.path.exists(other))
+            # the other model is evicted first
+            cache = ner.EntityCache(cache_dir, model_dir, max_size=30)
+            self.assertFalse(os.path.exists(other))
+
+            # then pages that were not part of the run
+            cache.update({"c": []})
+            cache = ner.EntityCache(cache_dir, model_dir)
+            self.assertEqual([cache.get("a"), cache.get("c")], [None, []])
+
+    def test_dir_sha1_memoized(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "model.bin")
+            with open(path, "wb") as f:
+                f.write(b"abc")
+            digest = ner._dir_sha1(dir)
+            with mock.patch.object(ner.hashlib, "sha1") as sha1_mock:
+                self.assertEqual(ner._dir_sha1(dir), digest)
+                sha1_mock.assert_not_called()
+
+            # same size but modified
+            with open(path, "wb") as f:
+                f.write(b"abd")
+            os.utime(path, ns=(0, 1))
+            self.assertNotEqual(ner._dir_sha1(dir), digest)
+
+
+class TrainSpacyModelTestCase(unittest.TestCase):
+    def test_train_spacy_model(self):
+        names = [
+            "John Smith",
+            "Mary Jones",
+            "Alan Brown",
+            "Rose White",
+            "Paul Green",
+            "Anne Black",
+        ]
+        agencies = ["Baton Rouge PD", "New Orleans PD", "Slidell PD"]
+        with tempfile.TemporaryDirectory() as dir:
+            training_data = os.path.join(dir, "training.jsonl")
+            with open(training_data, "w") as f:
+                for i in range(60):
+                    name, agency = names[i % len(names)], agencies[i % len(agencies)]
+                    text = "Officer %s was hired by %s." % (name, agency)
+                    start = text.index(agency)
+                    label = [
+                        [8, 8 + len(name), "officer_name"],
+                        [start, start + len(agency), "agency"],
+                    ]
+                    f.write(json.dumps({"text": text, "label": label}) + "\n")
+            checkpoint_dir = os.path.join(dir, "model")
+
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                nlp = train_spacy_model(
+                    training_data,
+                    n_iter=20,
+                    patience=3,
+                    checkpoint_dir=checkpoint_dir,
+                )
+            lines = out.getvalue().splitlines()
+            self.assertLessEqual(len(lines), 20)
+            self.assertRegex(
+                lines[0], r"^epoch 0: loss [\d.]+, dev ents_f [\d.]+, \d+ examples/sec$"
+            )
+
+            doc = nlp("Officer Mary Jones was hired by Slidell PD.")
+            self.assertEqual(
+                [(ent.label_, ent.text) for ent in doc.ents],
+                [("officer_name", "Mary Jones"), ("agency", "Slidell PD")],
+            )
+            self.assertEqual(spacy.load(checkpoint_dir).to_bytes(), nlp.to_bytes())
+
+    def test_train_spacy_model_without_examples(self):
+        with tempfile.TemporaryDirectory() as dir:
+            training_data = os.path.join(dir, "training.jsonl")
+            open(training_data, "w").close()
+            with self.assertRaisesRegex(ValueError, "no training example"):
+                train_spacy_model(training_data)
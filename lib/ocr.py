@@ -1,9 +1,12 @@
 import os
+from abc import ABC, abstractmethod
 from pathlib import Path
 import pathlib
 import tempfile
 import json
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, repeat
 from distutils.spawn import find_executable
 
 import deba
@@ -12,12 +15,19 @@ import numpy as np
 from google.cloud.storage import Client
 from google.auth import default
 
-from lib import queue_pdf_for_ocr
-from lib.ocr_layout import relayout_doc
+from lib import ocr_local, queue_pdf_for_ocr
+from lib.ocr_layout import RelayoutCache, relayout_doc
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 SOURCE_BUCKET = "k8s-ocr-jobqueue-pdfs"
 RESULT_BUCKET = "k8s-ocr-jobqueue-results"
 GCLOUD_PROJECT = "excellent-zoo-300106"
+# number of page records turned into a frame at once by _read_ocr_results
+RECORDS_PER_FRAME = 10000
 
 
 def _run_gsutil(*args):
@@ -46,17 +56,28 @@ def _run_gsutil(*args):
         )
 
 
-def _read_doc_result(filedir: Path, filesha1: str, count: int):
+def _read_doc_result(
+    filedir: Path, filesha1: str, count: int, cache: RelayoutCache or None = None
+):
     """read ocr results for a single document"""
-    relayout_page = relayout_doc()
+    if cache is None:
+        relayout_data = relayout_doc()
+        doc = None
+
+        def relayout_page(raw: bytes):
+            return relayout_data(_json_loads(raw))
+
+    else:
+        doc = cache.relayout_doc(filesha1, _json_loads)
+        relayout_page = doc.relayout_page
     for pageno in range(1, count + 1):
         try:
-            with (filedir / ("%03d.json" % pageno)).open() as f:
-                data = json.loads(f.read())
+            with (filedir / ("%03d.json" % pageno)).open("rb") as f:
+                raw = f.read()
             yield {
                 "filesha1": filesha1,
                 "pageno": pageno,
-                "paragraphs": relayout_page(data),
+                "paragraphs": relayout_page(raw),
                 "ocr_status": "success",
             }
         except FileNotFoundError:
@@ -66,56 +87,151 @@ def _read_doc_result(filedir: Path, filesha1: str, count: int):
                 "ocr_status": "page not found",
             }
             continue
+    if doc is not None:
+        doc.save()
+
+
+def _read_doc_records(
+    filedir: Path, filesha1: str, cache: RelayoutCache or None = None
+) -> list[dict]:
+    """read ocr results and report for a single document
+
+    Pages of a document are read in order by a single process because
+    relayout_doc derives line_y_dist_range from the first page.
+    """
+    if not filedir.exists():
+        return [
+            {
+                "filesha1": filesha1,
+                "pageno": pd.NA,
+                "ocr_status": "file not found",
+            }
+        ]
+    try:
+        with (filedir / "count").open() as f:
+            count = int(f.read())
+    except FileNotFoundError:
+        return [
+            {
+                "filesha1": filesha1,
+                "pageno": pd.NA,
+                "ocr_status": "count file not found",
+            }
+        ]
+    return list(_read_doc_result(filedir, filesha1, count, cache))
+
 
+def _read_ocr_results(df: pd.DataFrame, processes: int or None = None) -> pd.DataFrame:
+    """Read ocr results and report for filesha1 in df
 
-def _read_ocr_results(df: pd.DataFrame) -> pd.DataFrame:
-    """Read ocr results and report for filesha1 in df"""
+    Documents are read and relayouted in parallel by a process pool. Their
+    records are turned into frames every RECORDS_PER_FRAME records, so that
+    all records never have to be kept as Python dicts at the same time.
+
+    Args:
+        df (pd.DataFrame):
+            a frame containing PDFs metadata
+        processes (int):
+            number of worker processes. Defaults to the value of
+            environment variable "OCR_READ_PROCESSES" or the number of
+            CPUs. Documents are read in the current process if this is 1.
+
+    Relayouted pages are only cached if environment variable
+    "OCR_LAYOUT_CACHE_DIR" is set. The cache is not an output of any stage
+    so it should live outside of the data directory. It is trimmed to
+    "OCR_LAYOUT_CACHE_MAX_SIZE" bytes, 1GiB by default, after reading.
+
+    Returns:
+        the frame with 1 row per page
+    """
     ocr_dir = deba.data("ocr_results")
     ocr_dir.mkdir(parents=True, exist_ok=True)
+    if processes is None:
+        processes = int(os.getenv("OCR_READ_PROCESSES", "0")) or os.cpu_count()
+    cache_dir = os.getenv("OCR_LAYOUT_CACHE_DIR", "")
+    cache = (
+        RelayoutCache(
+            cache_dir, int(os.getenv("OCR_LAYOUT_CACHE_MAX_SIZE", str(1 << 30)))
+        )
+        if cache_dir != ""
+        else None
+    )
+    filesha1s = df.filesha1.values
+    filedirs = [
+        ocr_dir / filesha1[:2] / (filesha1[2:] + ".pdf") for filesha1 in filesha1s
+    ]
+
+    frames = []
     records = []
 
-    for filesha1 in df.filesha1.values:
-        filedir = ocr_dir / filesha1[:2] / (filesha1[2:] + ".pdf")
-        if not filedir.exists():
-            records.append(
-                {
-                    "filesha1": filesha1,
-                    "pageno": pd.NA,
-                    "ocr_status": "file not found",
-                }
-            )
-            continue
-        try:
-            with (filedir / "count").open() as f:
-                count = int(f.read())
-        except FileNotFoundError:
-            records.append(
-                {
-                    "filesha1": filesha1,
-                    "pageno": pd.NA,
-                    "ocr_status": "count file not found",
-                }
+    def collect(results):
+        nonlocal records
+        for doc_records in results:
+            records += doc_records
+            if len(records) >= RECORDS_PER_FRAME:
+                frames.append(pd.DataFrame.from_records(records))
+                records = []
+
+    if processes == 1:
+        collect(map(_read_doc_records, filedirs, filesha1s, repeat(cache)))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            collect(
+                executor.map(
+                    _read_doc_records,
+                    filedirs,
+                    filesha1s,
+                    repeat(cache),
+                    chunksize=max(1, len(filesha1s) // (processes * 8)),
+                )
             )
-            continue
-        records += list(_read_doc_result(filedir, filesha1, count))
+    if len(records) > 0 or len(frames) == 0:
+        frames.append(pd.DataFrame.from_records(records))
+
+    if cache is not None:
+        cache.evict()
 
-    files = pd.DataFrame.from_records(records)
+    files = pd.concat(frames, ignore_index=True)
     return files.merge(df, how="outer", on="filesha1")
 
 
-def _check_for_processing_files(df: pd.DataFrame) -> pd.DataFrame:
-    """finds files that are not yet present in the queue bucket and mark them as 'queued'"""
-    credentials, _ = default()
-    client = Client(GCLOUD_PROJECT, credentials=credentials)
-    sha1s = set()
-    for filesha1 in (
-        df.loc[df.ocr_status == "queueing", "filesha1"].drop_duplicates().values
-    ):
-        blobs = client.list_blobs(
-            SOURCE_BUCKET, 1, prefix=f"ocr/{filesha1[:2]}/{filesha1[2:]}"
+def _check_for_processing_files(
+    df: pd.DataFrame,
+    target: queue_pdf_for_ocr.UploadTarget or None = None,
+    max_workers: int = 16,
+) -> pd.DataFrame:
+    """finds files that are not yet present in the queue bucket and mark them as 'queued'
+
+    Files are queued under "ocr/<filesha1[:2]>/<filesha1[2:]>.pdf/". Rather
+    than looking up each file, the directories under each distinct
+    "ocr/<filesha1[:2]>/" prefix are listed once, in parallel, and files
+    are looked up in the listed directories.
+
+    Args:
+        df (pd.DataFrame):
+            the frame returned by _read_ocr_results
+        target (queue_pdf_for_ocr.UploadTarget):
+            the queue to look files up in. Defaults to the queue bucket.
+        max_workers (int):
+            the maximum number of prefixes listed at the same time
+
+    Returns:
+        the frame with "processing" ocr_status for files found in the queue
+    """
+    if target is None:
+        credentials, _ = default()
+        target = queue_pdf_for_ocr.BucketTarget(
+            SOURCE_BUCKET, Client(GCLOUD_PROJECT, credentials=credentials)
         )
-        if len(list(blobs)) > 0:
-            sha1s.add(filesha1)
+    filesha1s = df.loc[df.ocr_status == "queueing", "filesha1"].drop_duplicates()
+    prefixes = sorted(set("ocr/%s/" % filesha1[:2] for filesha1 in filesha1s))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dirs = set(chain.from_iterable(executor.map(target.list_dirs, prefixes)))
+    sha1s = set(
+        filesha1
+        for filesha1 in filesha1s
+        if "ocr/%s/%s.pdf/" % (filesha1[:2], filesha1[2:]) in dirs
+    )
     df.loc[df.filesha1.isin(sha1s), "ocr_status"] = "processing"
     return df
 
@@ -150,6 +266,121 @@ def _enqueue_pdf(
     return df
 
 
+class OCRBackend(ABC):
+    """Produces OCR results of pdf files
+
+    process_pdf hands the backend the rows of files whose results must be
+    produced, after reading the results that already exist.
+    """
+
+    @abstractmethod
+    def process(
+        self,
+        df: pd.DataFrame,
+        dir_name: str,
+        requeue: bool,
+        requeue_unsuccessful: bool,
+    ) -> pd.DataFrame:
+        """Produces OCR results of pdf files with "queueing" ocr_status
+
+        Args:
+            df (pd.DataFrame):
+                the frame returned by _read_ocr_results
+            dir_name (str):
+                the parent directory of all PDF files
+            requeue (bool):
+                produce results of all files in df, even those that were
+                processed already
+            requeue_unsuccessful (bool):
+                non-"success" files are being processed again
+
+        Returns:
+            the frame with updated ocr_status
+        """
+
+
+class JobQueueBackend(OCRBackend):
+    """Enqueues pdf files onto the Kubernetes OCR job queue
+
+    Files are marked as "queued" and their results are read by a later run
+    once they are synced to the ocr_results directory.
+    """
+
+    def process(
+        self,
+        df: pd.DataFrame,
+        dir_name: str,
+        requeue: bool,
+        requeue_unsuccessful: bool,
+    ) -> pd.DataFrame:
+        return _enqueue_pdf(df, dir_name, requeue, requeue_unsuccessful)
+
+
+class LocalBackend(OCRBackend):
+    """OCRs pdf files on the local machine
+
+    Results are written to the ocr_results directory in the same layout as
+    the job queue results and read back right away, so processed files come
+    out with "success" ocr_status in the same run.
+    """
+
+    def __init__(
+        self,
+        processes: int or None = None,
+        recognizer=ocr_local.doctr_recognizer,
+    ) -> None:
+        """Creates a new instance of LocalBackend
+
+        Args:
+            processes (int):
+                number of OCR processes. Defaults to the value of environment
+                variable "OCR_LOCAL_PROCESSES" or the number of CPUs.
+            recognizer (Callable):
+                see lib.ocr_local.ocr_pdfs
+
+        Returns:
+            no value
+        """
+        if processes is None:
+            processes = int(os.getenv("OCR_LOCAL_PROCESSES", "0")) or None
+        self._processes = processes
+        self._recognizer = recognizer
+
+    def process(
+        self,
+        df: pd.DataFrame,
+        dir_name: str,
+        requeue: bool,
+        requeue_unsuccessful: bool,
+    ) -> pd.DataFrame:
+        files = df if requeue else df.loc[df.ocr_status == "queueing"]
+        files = files.drop_duplicates("filesha1")
+        if len(files) == 0:
+            return df
+        ocr_local.ocr_pdfs(
+            [str((Path(dir_name) / filepath).resolve()) for filepath in files.filepath],
+            files.filesha1.tolist(),
+            deba.data("ocr_results"),
+            self._recognizer,
+            self._processes,
+            redo=requeue,
+        )
+        files = files.drop(
+            columns=["pageno", "paragraphs", "ocr_status"], errors="ignore"
+        )
+        frames = [_read_ocr_results(files)]
+        rest = df.loc[~df.filesha1.isin(files.filesha1)]
+        if len(rest) > 0:
+            frames.append(rest)
+        return pd.concat(frames, ignore_index=True)
+
+
+def _backend_from_env_var() -> OCRBackend:
+    if os.getenv("OCR_BACKEND", "").lower() == "local":
+        return LocalBackend()
+    return JobQueueBackend()
+
+
 def _arg_from_env_var(arg: bool, env_name: str) -> bool:
     if not arg and os.getenv(f"OCR_{env_name}", "").lower() == "true":
         return True
@@ -162,6 +393,7 @@ def process_pdf(
     requeue: bool = False,
     requeue_unsuccessful: bool = False,
     ensure_complete: bool = False,
+    backend: OCRBackend or None = None,
 ) -> pd.DataFrame:
     """Reads and returns PDF content as paragraphs of text
 
@@ -207,6 +439,10 @@ def process_pdf(
             raise error if there are non-"success" rows. This is also
             set to True if environment variable
             "OCR_ENSURE_COMPLETE" is set to "true".
+        backend (OCRBackend):
+            produces the results of files that weren't found. Defaults to
+            LocalBackend if environment variable "OCR_BACKEND" is set to
+            "local" and JobQueueBackend otherwise.
 
     Returns:
         exploded frame with 1 row per page
@@ -221,7 +457,9 @@ def process_pdf(
         df.loc[df.ocr_status != "success", "ocr_status"] = "queueing"
     else:
         df.loc[df.ocr_status == "file not found", "ocr_status"] = "queueing"
-    df = _enqueue_pdf(df, dir_name, requeue, requeue_unsuccessful)
+    if backend is None:
+        backend = _backend_from_env_var()
+    df = backend.process(df, dir_name, requeue, requeue_unsuccessful)
     df = df.sort_values(["filesha1", "pageno"]).reset_index(drop=True)
     if ensure_complete:
         n = df.loc[df.ocr_status != "success"].shape[0]
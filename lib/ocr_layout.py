@@ -1,4 +1,9 @@
-from typing import Tuple
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Callable, Tuple
 
 import numpy as np
 
@@ -76,35 +81,50 @@ def _rearrange_lines_into_blocks(data, line_y_dist_range):
     - lines that are within line_y_dist_range from each other
     - overlap in the x dimension
     - line height must not be too big or too small compared to the previous line
+
+    Lines are swept from top to bottom and each line joins the earliest
+    created block that satisfies the conditions with the block's last line.
+    A block whose last line is too far above the current line can never be
+    joined again so it is dropped from the candidates.
     """
     lines = sorted(
         [line for blk in data["blocks"] for line in blk["lines"]], key=_y_min_x_min
     )
+    min_dist, max_dist = line_y_dist_range
     blocks = list()
+    # (block, last line, last line's y max) of blocks that can still be
+    # joined, in the order the blocks were created
+    candidates = list()
     for line in lines:
-        for blk in blocks:
+        (x_min, y_min), (x_max, y_max) = line["geometry"]
+        remaining = list()
+        joined = None
+        for cand in candidates:
+            dist = y_min - cand[2]
+            if not dist < max_dist:
+                continue
+            remaining.append(cand)
             if (
-                _overlap_x(blk["lines"][-1], line)
-                and _line_y_dist_within_range(blk["lines"][-1], line, line_y_dist_range)
-                and _line_height_is_similar(blk["lines"][-1], line)
+                joined is None
+                and dist > min_dist
+                and _overlap_x(cand[1], line)
+                and _line_height_is_similar(cand[1], line)
             ):
-                blk["lines"].append(line)
-                break
+                joined = len(remaining) - 1
+        if joined is None:
+            blk = {"lines": [line], "geometry": [[x_min, y_min], [x_max, y_max]]}
+            blocks.append(blk)
+            remaining.append((blk, line, y_max))
         else:
-            blocks.append({"lines": [line]})
-    # calculate block geometry
-    for blk in blocks:
-        geometries = [l["geometry"] for l in blk["lines"]]
-        blk["geometry"] = [
-            [
-                min(g[0][0] for g in geometries),
-                min(g[0][1] for g in geometries),
-            ],
-            [
-                max(g[1][0] for g in geometries),
-                max(g[1][1] for g in geometries),
-            ],
-        ]
+            blk = remaining[joined][0]
+            blk["lines"].append(line)
+            geometry = blk["geometry"]
+            geometry[0][0] = min(geometry[0][0], x_min)
+            geometry[0][1] = min(geometry[0][1], y_min)
+            geometry[1][0] = max(geometry[1][0], x_max)
+            geometry[1][1] = max(geometry[1][1], y_max)
+            remaining[joined] = (blk, line, y_max)
+        candidates = remaining
     return blocks
 
 
@@ -136,6 +156,12 @@ def _concat_text(paragraphs):
     ]
 
 
+def _relayout_page(page, line_y_dist_range):
+    blocks = _rearrange_lines_into_blocks(page, line_y_dist_range)
+    paragraphs = _rearrange_blocks_into_paragraphs(blocks)
+    return _concat_text(paragraphs)
+
+
 def relayout_doc():
     """read ocr results for a single document and concat into paragraphs for each page"""
     line_y_dist_range = None
@@ -145,8 +171,141 @@ def relayout_doc():
         if line_y_dist_range is None:
             line_y_dist_range = _valid_line_y_dist_range(page)
             # print(f"line_y_dist_range: {line_y_dist_range}")
-        blocks = _rearrange_lines_into_blocks(page, line_y_dist_range)
-        paragraphs = _rearrange_blocks_into_paragraphs(blocks)
-        return _concat_text(paragraphs)
+        return _relayout_page(page, line_y_dist_range)
 
     return relayout_page
+
+
+def _sha1(b: bytes) -> str:
+    return hashlib.sha1(b, usedforsecurity=False).hexdigest()
+
+
+# relayout output depends on nothing but the page JSON and this module
+with open(__file__, "rb") as _f:
+    LAYOUT_VERSION = _sha1(_f.read())
+
+
+class _CachedDocRelayout(object):
+    """relayouts pages of a single document, reusing cached paragraphs"""
+
+    def __init__(self, path: Path, loads: Callable[[bytes], dict]):
+        self._path = path
+        self._loads = loads
+        self._first_page = None
+        self._line_y_dist_range = None
+        self._modified = False
+        self._seen = set()
+        try:
+            with path.open("rb") as f:
+                self._entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self._entry = None
+
+    def relayout_page(self, raw: bytes):
+        digest = _sha1(raw)
+        if self._first_page is None:
+            # line_y_dist_range comes from the first page, so cached
+            # paragraphs are only valid if the first page did not change
+            self._first_page = raw
+            if self._entry is None or self._entry["first_page"] != digest:
+                self._entry = {"first_page": digest, "pages": dict()}
+        pages = self._entry["pages"]
+        self._seen.add(digest)
+        if digest in pages:
+            return pages[digest]
+        if self._line_y_dist_range is None:
+            self._line_y_dist_range = _valid_line_y_dist_range(
+                self._loads(self._first_page)
+            )
+        paragraphs = _relayout_page(self._loads(raw), self._line_y_dist_range)
+        pages[digest] = paragraphs
+        self._modified = True
+        return paragraphs
+
+    def save(self):
+        pages = self._entry["pages"] if self._entry is not None else dict()
+        if len(pages) > len(self._seen):
+            # drop pages that are no longer part of the document
+            self._entry["pages"] = {d: pages[d] for d in pages if d in self._seen}
+            self._modified = True
+        if self._modified:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(self._entry, f)
+            os.replace(tmp_path, self._path)
+        elif self._path.exists():
+            # mark as recently used for eviction
+            os.utime(self._path)
+
+
+class RelayoutCache(object):
+    """On-disk cache of relayouted pages
+
+    Paragraphs of each page are keyed by the hash of the page JSON and kept
+    in one file per document. Files are stored under a directory named after
+    LAYOUT_VERSION so editing this module invalidates the whole cache.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = 1 << 30):
+        """Creates a new instance of RelayoutCache
+
+        Args:
+            cache_dir (str):
+                the directory to store cached paragraphs in
+            max_size (int):
+                the size in bytes above which the least recently used
+                documents are evicted. Defaults to 1GiB.
+
+        Returns:
+            no value
+        """
+        self._root = Path(cache_dir)
+        self._dir = self._root / LAYOUT_VERSION
+        self._max_size = max_size
+
+    def relayout_doc(
+        self, filesha1: str, loads: Callable[[bytes], dict]
+    ) -> _CachedDocRelayout:
+        """Returns the relayout of a single document
+
+        The returned object's relayout_page method takes the raw page JSON
+        and must be called with the pages of the document in order. Its save
+        method must be called after the last page.
+
+        Args:
+            filesha1 (str):
+                sha1 of the document
+            loads (Callable):
+                function that decodes page JSON
+
+        Returns:
+            the document relayout
+        """
+        return _CachedDocRelayout(self._dir / filesha1[:2] / filesha1[2:], loads)
+
+    def evict(self):
+        """Removes least recently used documents until the cache fits max_size
+
+        Documents of every LAYOUT_VERSION count towards the size. Documents of
+        outdated versions are not used anymore so they are evicted first,
+        while those still used by a stage running another version of this
+        module stay recently used. Files are removed one at a time so
+        concurrent readers at worst miss the cache.
+        """
+        files = []
+        for path in self._root.glob("*/*/*"):
+            if path.suffix == ".tmp":
+                # being written by another process
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in sorted(files):
+            if size <= self._max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= file_size
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import ocr_layout
+from lib.ocr_layout import RelayoutCache, relayout_doc
+
+
+def _page(lines):
+    return {
+        "blocks": [
+            {
+                "lines": [
+                    {
+                        "geometry": [[x, y], [x + 0.2, y + 0.01]],
+                        "words": [{"value": word} for word in text.split()],
+                    }
+                    for x, y, text in lines
+                ]
+            }
+        ]
+    }
+
+
+class RelayoutCacheTestCase(unittest.TestCase):
+    def test_relayout_doc(self):
+        pages = [
+            _page([(0.1, 0.1, "first line"), (0.1, 0.5, "second line")]),
+            _page([(0.1, 0.2, "third"), (0.5, 0.2, "fourth")]),
+        ]
+        raws = [json.dumps(page).encode("utf-8") for page in pages]
+        relayout_page = relayout_doc()
+        expected = [relayout_page(page) for page in pages]
+
+        with tempfile.TemporaryDirectory() as dir:
+            cache = RelayoutCache(dir)
+
+            def relayout(raws):
+                doc = cache.relayout_doc("abcdef", json.loads)
+                paragraphs = [doc.relayout_page(raw) for raw in raws]
+                doc.save()
+                return paragraphs
+
+            self.assertEqual(relayout(raws), expected)
+            with mock.patch.object(ocr_layout, "_relayout_page") as relayout_mock:
+                self.assertEqual(relayout(raws), expected)
+                relayout_mock.assert_not_called()
+
+            # a changed first page invalidates every page of the document
+            pages[0] = _page([(0.1, 0.1, "first line changed")])
+            raws[0] = json.dumps(pages[0]).encode("utf-8")
+            relayout_page = relayout_doc()
+            self.assertEqual(relayout(raws), [relayout_page(page) for page in pages])
+
+    def test_removed_pages_are_dropped(self):
+        raws = [
+            json.dumps(_page([(0.1, 0.1, text)])).encode("utf-8")
+            for text in ["a", "b", "c"]
+        ]
+        with tempfile.TemporaryDirectory() as dir:
+            cache = RelayoutCache(dir)
+            for n in [3, 2]:
+                doc = cache.relayout_doc("abcdef", json.loads)
+                for raw in raws[:n]:
+                    doc.relayout_page(raw)
+                doc.save()
+            doc = cache.relayout_doc("abcdef", json.loads)
+            self.assertEqual(len(doc._entry["pages"]), 2)
+
+    def test_evict(self):
+        with tempfile.TemporaryDirectory() as dir:
+            outdated = os.path.join(dir, "outdated", "ab")
+            os.makedirs(outdated)
+            for name in ["old", "recent", "x.tmp"]:
+                with open(os.path.join(outdated, name), "wb") as f:
+                    f.write(b"x" * 1000)
+            os.utime(os.path.join(outdated, "old"), (0, 0))
+            cache = RelayoutCache(dir, max_size=2000)
+            doc = cache.relayout_doc("abcdef", json.loads)
+            doc.relayout_page(json.dumps(_page([(0.1, 0.1, "a")])).encode("utf-8"))
+            doc.save()
+
+            # least recently used documents of any version go first
+            cache.evict()
+            self.assertEqual(sorted(os.listdir(outdated)), ["recent", "x.tmp"])
+            self.assertEqual(
+                os.listdir(os.path.join(dir, ocr_layout.LAYOUT_VERSION, "ab")),
+                ["cdef"],
+            )
+
+            RelayoutCache(dir, max_size=0).evict()
+            self.assertEqual(os.listdir(outdated), ["x.tmp"])
+            self.assertEqual(
+                os.listdir(os.path.join(dir, ocr_layout.LAYOUT_VERSION, "ab")), []
+            )
+
+
+class RearrangeLinesIntoBlocksTestCase(unittest.TestCase):
+    def test_rearrange_lines_into_blocks(self):
+        page = _page(
+            [
+                (0.1, 0.1, "a"),
+                (0.15, 0.115, "b"),
+                (0.6, 0.1, "c"),
+                (0.1, 0.5, "d"),
+                (0.12, 0.13, "e"),
+            ]
+        )
+
+        def texts(blocks):
+            return [
+                [line["words"][0]["value"] for line in blk["lines"]] for blk in blocks
+            ]
+
+        self.assertEqual(
+            texts(ocr_layout._rearrange_lines_into_blocks(page, (0, 0.01))),
+            [["a"], ["c"], ["b"], ["e"], ["d"]],
+        )
+        with mock.patch.object(
+            ocr_layout, "_line_height_is_similar", return_value=True
+        ):
+            blocks = ocr_layout._rearrange_lines_into_blocks(page, (0, 0.01))
+            self.assertEqual(texts(blocks), [["a", "b", "e"], ["c"], ["d"]])
+            self.assertEqual(
+                blocks[0]["geometry"], [[0.1, 0.1], [0.15 + 0.2, 0.13 + 0.01]]
+            )
@@ -0,0 +1,150 @@
+import os
+import json
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional
+
+from tqdm import tqdm
+import pypdfium2 as pdfium
+
+from lib.queue_pdf_for_ocr import RENDER_SCALE
+
+# number of pages recognized by a single task
+PAGES_PER_TASK = 8
+
+# page recognizer of the current worker process, see _init_worker
+_recognize = None
+
+
+def doctr_recognizer() -> Callable:
+    """Returns a function that OCRs a page image with doctr
+
+    This is the model run by the OCR job queue. The returned function takes
+    a PIL image and returns the exported doctr page, which is what the job
+    queue writes to NNN.json. Requires the python-doctr package.
+    """
+    import numpy as np
+    from doctr.models import ocr_predictor
+
+    model = ocr_predictor(pretrained=True)
+
+    def recognize(img) -> dict:
+        return model([np.asarray(img.convert("RGB"))]).export()["pages"][0]
+
+    return recognize
+
+
+def _init_worker(recognizer: Callable[[], Callable]) -> None:
+    global _recognize
+    _recognize = recognizer()
+
+
+def _page_count(filepath: str) -> int:
+    with pdfium.PdfDocument(filepath) as pdf:
+        return len(pdf)
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _ocr_pages(filepath: str, pdf_dir: Path, pagenos: List[int]) -> None:
+    """Renders and recognizes the given pages of a pdf file"""
+    with pdfium.PdfDocument(filepath) as pdf:
+        for pageno in pagenos:
+            page = pdf.get_page(pageno - 1)
+            try:
+                img = page.render_topil(scale=RENDER_SCALE)
+            finally:
+                page.close()
+            _write_atomic(pdf_dir / ("%03d.json" % pageno), json.dumps(_recognize(img)))
+
+
+def ocr_pdfs(
+    filepaths: List[str],
+    filesha1s: List[str],
+    ocr_dir: Path,
+    recognizer: Callable[[], Callable] = doctr_recognizer,
+    processes: Optional[int] = None,
+    redo: bool = False,
+) -> None:
+    """OCRs pdf files on the local machine
+
+    Results are written to ocr_dir in the same layout as the results of the
+    OCR job queue: page N of a file is written to
+    "<filesha1[:2]>/<filesha1[2:]>.pdf/NNN.json" and the number of pages
+    to the "count" file next to it once all pages are written. Pages are
+    rendered like queue_pdf_for_ocr renders them and recognized in chunks
+    by a process pool.
+
+    Args:
+        filepaths (list of str):
+            paths of the pdf files
+        filesha1s (list of str):
+            SHA1 hash of each file
+        ocr_dir (Path):
+            the OCR results directory
+        recognizer (Callable):
+            a picklable function that is called once in each worker process
+            and returns the function that OCRs a page image. Defaults to
+            doctr_recognizer.
+        processes (int):
+            number of worker processes. Defaults to the number of CPUs.
+        redo (bool):
+            OCR every page even if its result already exists
+
+    Returns:
+        no value
+    """
+    docs = dict(zip(filesha1s, filepaths))
+    if len(docs) == 0:
+        return
+    pdf_dirs = {
+        filesha1: Path(ocr_dir) / filesha1[:2] / (filesha1[2:] + ".pdf")
+        for filesha1 in docs
+    }
+    with ProcessPoolExecutor(
+        processes, initializer=_init_worker, initargs=(recognizer,)
+    ) as executor:
+        counts = dict(zip(docs, executor.map(_page_count, docs.values())))
+        remaining = dict()
+        futures = dict()
+        for filesha1, filepath in docs.items():
+            pdf_dir = pdf_dirs[filesha1]
+            pdf_dir.mkdir(parents=True, exist_ok=True)
+            if redo:
+                (pdf_dir / "count").unlink(missing_ok=True)
+            pagenos = [
+                pageno
+                for pageno in range(1, counts[filesha1] + 1)
+                if redo or not (pdf_dir / ("%03d.json" % pageno)).exists()
+            ]
+            remaining[filesha1] = 0
+            for i in range(0, len(pagenos), PAGES_PER_TASK):
+                chunk = pagenos[i : i + PAGES_PER_TASK]
+                fut = executor.submit(_ocr_pages, filepath, pdf_dir, chunk)
+                futures[fut] = (filesha1, len(chunk))
+                remaining[filesha1] += 1
+
+        def write_count(filesha1: str) -> None:
+            _write_atomic(pdf_dirs[filesha1] / "count", str(counts[filesha1]))
+
+        for filesha1, n in remaining.items():
+            if n == 0:
+                write_count(filesha1)
+        with tqdm(
+            desc="ocr pages",
+            total=sum(n for _, n in futures.values()),
+            leave=False,
+        ) as progress:
+            for fut in as_completed(futures):
+                fut.result()
+                filesha1, n_pages = futures[fut]
+                progress.update(n_pages)
+                remaining[filesha1] -= 1
+                if remaining[filesha1] == 0:
+                    write_count(filesha1)
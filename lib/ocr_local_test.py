@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.ocr_layout import relayout_doc
+from lib.ocr_local import ocr_pdfs
+from lib.queue_pdf_for_ocr_test import write_pdf
+
+
+def size_recognizer():
+    """Returns a recognizer that reads the size of the page image"""
+
+    def recognize(img) -> dict:
+        geometry = [[0.1, 0.1], [0.5, 0.2]]
+        return {
+            "blocks": [
+                {
+                    "geometry": geometry,
+                    "lines": [
+                        {
+                            "geometry": geometry,
+                            "words": [
+                                {"value": "%dx%d" % img.size, "geometry": geometry}
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    return recognize
+
+
+class OcrPdfsTestCase(unittest.TestCase):
+    def test_ocr_pdfs(self):
+        with tempfile.TemporaryDirectory() as dir:
+            filepaths = [os.path.join(dir, "a.pdf"), os.path.join(dir, "b.pdf")]
+            write_pdf(filepaths[0], 3)
+            write_pdf(filepaths[1], 1)
+            filesha1s = ["ab" + "0" * 38, "cd" + "0" * 38]
+            ocr_dir = Path(dir) / "ocr_results"
+
+            ocr_pdfs(filepaths, filesha1s, ocr_dir, size_recognizer, processes=2)
+            pdf_dir = ocr_dir / "ab" / ("0" * 38 + ".pdf")
+            self.assertEqual(
+                sorted(os.listdir(pdf_dir)),
+                ["001.json", "002.json", "003.json", "count"],
+            )
+            self.assertEqual((pdf_dir / "count").read_text(), "3")
+            self.assertEqual(
+                (ocr_dir / "cd" / ("0" * 38 + ".pdf") / "count").read_text(), "1"
+            )
+            relayout_page = relayout_doc()
+            self.assertEqual(
+                [
+                    relayout_page(
+                        json.loads((pdf_dir / ("%03d.json" % pageno)).read_text())
+                    )
+                    for pageno in range(1, 4)
+                ],
+                [[[[size]]] for size in ["200x400", "202x400", "204x400"]],
+            )
+
+            # existing pages are kept unless redo is set
+            (pdf_dir / "002.json").unlink()
+            (pdf_dir / "003.json").write_text("{}")
+            ocr_pdfs(filepaths, filesha1s, ocr_dir, size_recognizer, processes=2)
+            self.assertEqual((pdf_dir / "003.json").read_text(), "{}")
+            self.assertTrue((pdf_dir / "002.json").exists())
+            ocr_pdfs(
+                filepaths, filesha1s, ocr_dir, size_recognizer, processes=2, redo=True
+            )
+            self.assertNotEqual((pdf_dir / "003.json").read_text(), "{}")
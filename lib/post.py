@@ -1,7 +1,18 @@
+import functools
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+
 from lib import events
+from lib.storage import read_frame, write_frame
 import pandas as pd
 import deba
 
+# column holding the row number of each officer in the POST CSV file
+_ROW_COLUMN = "__post_row__"
+
 
 def keep_latest_row_for_each_post_officer(post: pd.DataFrame) -> pd.DataFrame:
     """Sort and discard all but the latest rows for each officer in POST data"""
@@ -17,6 +28,22 @@ def keep_latest_row_for_each_post_officer(post: pd.DataFrame) -> pd.DataFrame:
     return post[~post.index.duplicated(keep="first")]
 
 
+def _join_matched_rows(
+    post: pd.DataFrame,
+    uid_matches: list[tuple[str, str]],
+    columns: list[str],
+    agency: str,
+) -> pd.DataFrame:
+    """Joins match pairs against the POST rows of the matched officers
+
+    Rows come out in the order of uid_matches, then in the order of the POST
+    rows of each officer. uid is set to pprr_uid.
+    """
+    matches = pd.DataFrame(list(uid_matches), columns=["uid", "post_uid"])
+    rows = matches.join(post.set_index("uid")[columns], on="post_uid", how="inner")
+    return rows[["uid"] + columns].reset_index(drop=True).assign(agency=agency)
+
+
 def extract_events_from_post(
     post: pd.DataFrame, uid_matches: list[tuple[str, str]], agency: str
 ) -> pd.DataFrame:
@@ -38,26 +65,27 @@ def extract_events_from_post(
         the events frame
     """
     builder = events.Builder()
-    for pprr_uid, post_uid in uid_matches:
-        for _, row in post[post.uid == post_uid].iterrows():
-            if pd.notnull(row.level_1_cert_date):
-                builder.append_record(
-                    events.OFFICER_LEVEL_1_CERT,
-                    ["uid"],
-                    raw_date_str=row.level_1_cert_date,
-                    strptime_format="%Y-%m-%d",
-                    agency=agency,
-                    uid=pprr_uid,
-                )
-            if pd.notnull(row.last_pc_12_qualification_date):
-                builder.append_record(
-                    events.OFFICER_PC_12_QUALIFICATION,
-                    ["uid"],
-                    raw_date_str=row.last_pc_12_qualification_date,
-                    strptime_format="%Y-%m-%d",
-                    agency=agency,
-                    uid=pprr_uid,
-                )
+    builder.extract_events(
+        _join_matched_rows(
+            post,
+            uid_matches,
+            ["level_1_cert_date", "last_pc_12_qualification_date"],
+            agency,
+        ),
+        {
+            events.OFFICER_LEVEL_1_CERT: {
+                "prefix": "level_1_cert",
+                "parse_date": "%Y-%m-%d",
+                "keep": ["uid", "agency"],
+            },
+            events.OFFICER_PC_12_QUALIFICATION: {
+                "prefix": "last_pc_12_qualification",
+                "parse_date": "%Y-%m-%d",
+                "keep": ["uid", "agency"],
+            },
+        },
+        ["uid"],
+    )
     return builder.to_frame()
 
 
@@ -82,22 +110,87 @@ def extract_events_from_cprr_post(
         the events frame
     """
     builder = events.Builder()
-    for pprr_uid, cprr_post_uid in uid_matches:
-        for _, row in cprr_post[cprr_post.uid == cprr_post_uid].iterrows():
-            if pd.notnull(row.decertification_date):
-                builder.append_record(
-                    events.OFFICER_POST_DECERTIFICATION,
-                    ["uid"],
-                    raw_date_str=row.decertification_date,
-                    agency=agency,
-                    uid=pprr_uid,
-                )
+    builder.extract_events(
+        _join_matched_rows(cprr_post, uid_matches, ["decertification_date"], agency),
+        {
+            events.OFFICER_POST_DECERTIFICATION: {
+                "prefix": "decertification",
+                "parse_date": True,
+                "keep": ["uid", "agency"],
+            },
+        },
+        ["uid"],
+    )
     return builder.to_frame()
 
 
-def load_for_agency(agency):
+def _post_store_dir() -> pathlib.Path:
+    return pathlib.Path(os.getenv("POST_STORE_DIR", str(deba.data("post_store"))))
+
+
+def _build_post_store(version_dir: pathlib.Path) -> None:
+    """Splits the POST CSV file into one parquet file per agency"""
     post = pd.read_csv(deba.data("clean/pprr_post_2020_11_06.csv"))
-    post = post.loc[post.agency == agency]
-    if len(post) == 0:
-        raise ValueError("agency not found", agency)
+    post.index.name = _ROW_COLUMN
+    post = post.reset_index()
+
+    version_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = pathlib.Path(tempfile.mkdtemp(dir=version_dir.parent, suffix=".tmp"))
+    partitions = dict()
+    for agency, df in post.groupby("agency", sort=False):
+        partitions[agency] = "%04d.parquet" % len(partitions)
+        write_frame(df, tmp_dir / partitions[agency])
+    with open(tmp_dir / "agencies.json", "w") as f:
+        json.dump(partitions, f)
+    try:
+        os.rename(tmp_dir, version_dir)
+    except OSError:
+        # another process stored the same version first
+        shutil.rmtree(tmp_dir)
+        return
+    for stale_dir in version_dir.parent.iterdir():
+        if stale_dir != version_dir and not stale_dir.name.endswith(".tmp"):
+            shutil.rmtree(stale_dir, ignore_errors=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _post_partitions(version_dir: pathlib.Path) -> dict[str, pathlib.Path]:
+    if not (version_dir / "agencies.json").exists():
+        _build_post_store(version_dir)
+    with open(version_dir / "agencies.json", "r") as f:
+        return {agency: version_dir / name for agency, name in json.load(f).items()}
+
+
+@functools.lru_cache(maxsize=None)
+def _read_post_partition(path: pathlib.Path) -> pd.DataFrame:
+    post = read_frame(path).set_index(_ROW_COLUMN)
+    post.index.name = None
     return post
+
+
+def load_for_agency(agency: str) -> pd.DataFrame:
+    """Loads the POST rows of an agency
+
+    The POST CSV file is only parsed once: its rows are stored as one
+    parquet file per agency under the POST_STORE_DIR environment variable
+    or deba.data("post_store"). The store is rebuilt when the size or the
+    modification time of the CSV file changes. Each agency is read once per
+    process and the rows keep their index in the CSV file.
+
+    Args:
+        agency (str):
+            agency name as it appears in POST data
+
+    Raises:
+        ValueError: the agency has no row in POST data
+
+    Returns:
+        the POST rows of the agency
+    """
+    stat = os.stat(deba.data("clean/pprr_post_2020_11_06.csv"))
+    partitions = _post_partitions(
+        _post_store_dir() / ("%d-%d" % (stat.st_size, stat.st_mtime_ns))
+    )
+    if agency not in partitions:
+        raise ValueError("agency not found", agency)
+    return _read_post_partition(partitions[agency]).copy()
@@ -0,0 +1,135 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from lib import post
+
+
+class LoadForAgencyTestCase(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.data_dir = pathlib.Path(self._dir.name)
+        (self.data_dir / "clean").mkdir()
+        self.csv_path = self.data_dir / "clean" / "pprr_post_2020_11_06.csv"
+        self.patch = mock.patch.object(
+            post.deba, "data", lambda filepath: self.data_dir / filepath
+        )
+        self.patch.start()
+        post._post_partitions.cache_clear()
+        post._read_post_partition.cache_clear()
+
+    def tearDown(self):
+        self.patch.stop()
+        post._post_partitions.cache_clear()
+        post._read_post_partition.cache_clear()
+        self._dir.cleanup()
+
+    def write_post(self, rows):
+        pd.DataFrame(
+            rows,
+            columns=["agency", "uid", "first_name", "level_1_cert_date", "year"],
+        ).to_csv(self.csv_path, index=False)
+
+    def expected(self, agency):
+        df = pd.read_csv(self.csv_path)
+        return df.loc[df.agency == agency]
+
+    def test_load_for_agency(self):
+        self.write_post(
+            [
+                ["baker-pd", "a1", "john", "2001-01-02", 2001],
+                ["new-orleans-pd", "a2", "mary", np.nan, 2002],
+                ["baker-pd", "a3", np.nan, "2003-04-05", np.nan],
+                [np.nan, "a4", "kim", np.nan, 2004],
+                ["new-orleans-pd", "a5", "lee", "2005-06-07", 2005],
+            ]
+        )
+        for agency in ["baker-pd", "new-orleans-pd"]:
+            df = post.load_for_agency(agency)
+            assert_frame_equal(df, self.expected(agency))
+            df.loc[:, "uid"] = "changed"
+            assert_frame_equal(post.load_for_agency(agency), self.expected(agency))
+        with self.assertRaises(ValueError):
+            post.load_for_agency("hammond-pd")
+
+        store_dir = self.data_dir / "post_store"
+        self.assertEqual(len(os.listdir(store_dir)), 1)
+        expected = self.expected("baker-pd")
+        with mock.patch.object(post.pd, "read_csv") as read_csv_mock:
+            post._post_partitions.cache_clear()
+            post._read_post_partition.cache_clear()
+            assert_frame_equal(post.load_for_agency("baker-pd"), expected)
+            read_csv_mock.assert_not_called()
+
+    def test_missing_in_partition(self):
+        self.write_post(
+            [
+                ["baker-pd", "a1", np.nan, "2001-01-02", 2001],
+                ["new-orleans-pd", "a2", "mary", np.nan, 2002],
+                ["baker-pd", "a3", np.nan, np.nan, 2003],
+            ]
+        )
+        df = post.load_for_agency("baker-pd")
+        expected = self.expected("baker-pd")
+        self.assertTrue(df.first_name.isna().all())
+        for col in ["first_name", "level_1_cert_date"]:
+            self.assertEqual(
+                df[col].astype(str).tolist(), expected[col].astype(str).tolist()
+            )
+
+    def test_rebuild_when_file_changes(self):
+        self.write_post([["baker-pd", "a1", "john", "2001-01-02", 2001]])
+        post.load_for_agency("baker-pd")
+        self.write_post(
+            [
+                ["baker-pd", "a1", "john", "2001-01-02", 2001],
+                ["baker-pd", "a2", "mary", np.nan, 2002],
+            ]
+        )
+        assert_frame_equal(post.load_for_agency("baker-pd"), self.expected("baker-pd"))
+        self.assertEqual(len(os.listdir(self.data_dir / "post_store")), 1)
+
+
+class ExtractEventsFromPostTestCase(unittest.TestCase):
+    def setUp(self):
+        self.post = pd.DataFrame(
+            {
+                "uid": ["p1", "p2", "p1"],
+                "level_1_cert_date": ["2001-01-02", np.nan, np.nan],
+                "last_pc_12_qualification_date": [
+                    "2010-03-04",
+                    "2011-05-06",
+                    "2012-07-08",
+                ],
+                "decertification_date": [np.nan, "5/6/2015", np.nan],
+            }
+        )
+
+    def test_extract_events_from_post(self):
+        df = post.extract_events_from_post(
+            self.post, [("a1", "p1"), ("a2", "p2"), ("a3", "p3")], "baker-pd"
+        )
+        self.assertEqual(
+            df[["kind", "year", "month", "day", "uid", "agency"]].values.tolist(),
+            [
+                ["officer_level_1_cert", "2001", "1", "2", "a1", "baker-pd"],
+                ["officer_pc_12_qualification", "2010", "3", "4", "a1", "baker-pd"],
+                ["officer_pc_12_qualification", "2011", "5", "6", "a2", "baker-pd"],
+                ["officer_pc_12_qualification", "2012", "7", "8", "a1", "baker-pd"],
+            ],
+        )
+
+    def test_extract_events_from_cprr_post(self):
+        df = post.extract_events_from_cprr_post(
+            self.post, [("a1", "p1"), ("a2", "p2")], "baker-pd"
+        )
+        self.assertEqual(
+            df[["kind", "year", "month", "day", "raw_date", "uid"]].values.tolist(),
+            [["officer_post_decertification", "2015", "5", "6", "5/6/2015", "a2"]],
+        )
@@ -2,10 +2,21 @@
 
 import os
 import argparse
+from abc import ABC, abstractmethod
+import hashlib
+import pathlib
+import shutil
 import tempfile
 import subprocess
 import json
-from typing import List
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from tqdm import tqdm
 import pypdfium2 as pdfium
@@ -13,67 +24,424 @@ import pypdfium2 as pdfium
 
 SOURCE_BUCKET = "k8s-ocr-jobqueue-pdfs"
 KUSTOMIZE_DIR = "k8s-ocr-jobqueue"
+RENDER_SCALE = 2
+# number of pages rendered by a single task
+PAGES_PER_TASK = 16
+# maximum number of rendered pages waiting on disk to be uploaded
+MAX_PENDING_PAGES = 512
+UPLOAD_THREADS = 16
+DEFAULT_MANIFEST_PATH = str(
+    pathlib.Path(os.path.realpath(__file__)).parent.parent
+    / "data"
+    / "ocr_queue_manifest.jsonl"
+)
 
 
-def run(paths: List[str], pos=0) -> None:
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        if len(paths) > 1:
-            paths = tqdm(paths, desc="pdf paths", position=pos, leave=False)
-            pos += 1
-        for path in paths:
-            path = path.rstrip("/")
-            head, _ = os.path.split(path)
-            for root, _, files in tqdm(
-                list(os.walk(path)), desc=path, position=pos, leave=False
+class UploadTarget(ABC):
+    """Destination of rendered pages
+
+    Subclasses must set uri to a string identifying the destination and
+    implement upload and exists. Both are called from multiple threads.
+    """
+
+    uri: str
+
+    @abstractmethod
+    def upload(self, filepath: str, key: str) -> None:
+        """Uploads a local file to the given key"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Returns whether the given key exists in the destination"""
+
+    @abstractmethod
+    def list_dirs(self, prefix: str) -> List[str]:
+        """Returns the directories right under prefix, which must end with "/"
+
+        E.g. "ocr/ab/cd.pdf/" is returned for prefix "ocr/ab/" if there is
+        a "ocr/ab/cd.pdf/001.png" key.
+        """
+
+
+class BucketTarget(UploadTarget):
+    """Uploads pages to a Google Cloud Storage bucket"""
+
+    def __init__(self, bucket_name: str = SOURCE_BUCKET, client=None) -> None:
+        """Creates a new instance of BucketTarget
+
+        Args:
+            bucket_name (str):
+                the bucket to upload to
+            client (google.cloud.storage.Client):
+                the storage client. Defaults to a client of the default
+                project and credentials.
+
+        Returns:
+            no value
+        """
+        if client is None:
+            from google.cloud.storage import Client
+
+            client = Client()
+        self.uri = "gs://%s" % bucket_name
+        self._client = client
+        self._bucket = client.bucket(bucket_name)
+
+    def upload(self, filepath: str, key: str) -> None:
+        self._bucket.blob(key).upload_from_filename(filepath)
+
+    def exists(self, key: str) -> bool:
+        return self._bucket.blob(key).exists()
+
+    def list_dirs(self, prefix: str) -> List[str]:
+        blobs = self._client.list_blobs(self._bucket, prefix=prefix, delimiter="/")
+        # prefixes are collected while the pages of the listing are read
+        for _ in blobs:
+            pass
+        return sorted(blobs.prefixes)
+
+
+class LocalDirTarget(UploadTarget):
+    """Copies pages to a local directory, laid out the same way as the bucket"""
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        self.uri = pathlib.Path(self.root).as_uri()
+
+    def upload(self, filepath: str, key: str) -> None:
+        dst = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copyfile(filepath, dst)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self.root, key))
+
+    def list_dirs(self, prefix: str) -> List[str]:
+        dir = os.path.join(self.root, prefix)
+        if not os.path.isdir(dir):
+            return []
+        return [
+            prefix + name + "/"
+            for name in sorted(os.listdir(dir))
+            if os.path.isdir(os.path.join(dir, name))
+        ]
+
+
+class _Doc(NamedTuple):
+    filepath: str
+    key: str
+    sha1: str
+    count: int
+
+
+class Manifest(object):
+    """Records which pages of which documents were uploaded to each target
+
+    The manifest is a JSON lines file that is appended to as pages are
+    uploaded, so that an interrupted run does not render them again. A
+    document is recorded under its key together with its SHA1 hash and
+    page count, and it is complete once its count file is uploaded.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Creates a new instance of Manifest
+
+        Args:
+            path (str):
+                the manifest file, created if it does not exist
+
+        Returns:
+            no value
+        """
+        self._path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._docs: Dict[Tuple[str, str], dict] = dict()
+        try:
+            with open(path, "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # last line of an interrupted write
+                continue
+            self._apply(rec)
+
+    def _apply(self, rec: dict) -> None:
+        k = (rec["target"], rec["key"])
+        entry = self._docs.get(k)
+        if entry is None or entry["sha1"] != rec["sha1"]:
+            entry = {"sha1": rec["sha1"], "count": rec["count"], "pages": set()}
+            entry["complete"] = False
+            self._docs[k] = entry
+        entry["pages"].update(rec.get("pages", []))
+        entry["complete"] = entry["complete"] or rec.get("complete", False)
+
+    def _append(self, rec: dict) -> None:
+        self._apply(rec)
+        with open(self._path, "a") as f:
+            f.write(json.dumps(rec) + "\n")
+
+    def is_complete(self, target: UploadTarget, doc: _Doc) -> bool:
+        """Returns whether all pages and the count file of doc were uploaded"""
+        entry = self._docs.get((target.uri, doc.key))
+        return entry is not None and entry["sha1"] == doc.sha1 and entry["complete"]
+
+    def uploaded_pages(self, target: UploadTarget, doc: _Doc) -> set:
+        """Returns page numbers of doc that were uploaded"""
+        entry = self._docs.get((target.uri, doc.key))
+        if entry is None or entry["sha1"] != doc.sha1:
+            return set()
+        return entry["pages"]
+
+    def add_pages(self, target: UploadTarget, doc: _Doc, pagenos: List[int]) -> None:
+        """Records uploaded pages of doc"""
+        self._append(
+            {
+                "target": target.uri,
+                "key": doc.key,
+                "sha1": doc.sha1,
+                "count": doc.count,
+                "pages": pagenos,
+            }
+        )
+
+    def complete(self, target: UploadTarget, doc: _Doc) -> None:
+        """Records that the count file of doc was uploaded"""
+        self._append(
+            {
+                "target": target.uri,
+                "key": doc.key,
+                "sha1": doc.sha1,
+                "count": doc.count,
+                "complete": True,
+            }
+        )
+
+    def forget(self, target: UploadTarget, doc: _Doc) -> None:
+        """Forgets uploads of doc, e.g. because they were removed from target"""
+        self._docs.pop((target.uri, doc.key), None)
+
+    def compact(self) -> None:
+        """Rewrites the manifest with a single line per document"""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self._path)), suffix=".tmp"
+        )
+        with os.fdopen(fd, "w") as f:
+            for (uri, key), entry in self._docs.items():
+                rec = {
+                    "target": uri,
+                    "key": key,
+                    "sha1": entry["sha1"],
+                    "count": entry["count"],
+                    "pages": sorted(entry["pages"]),
+                }
+                if entry["complete"]:
+                    rec["complete"] = True
+                f.write(json.dumps(rec) + "\n")
+        os.replace(tmp_path, self._path)
+
+
+def _find_pdfs(paths: List[str]) -> List[Tuple[str, str]]:
+    """Returns path and destination key of each pdf file under paths"""
+    pdfs = []
+    for path in paths:
+        path = path.rstrip("/")
+        head, _ = os.path.split(path)
+        for root, _, files in os.walk(path):
+            relroot = os.path.relpath(root, head)
+            for file in sorted(files):
+                if not file.endswith(".pdf"):
+                    continue
+                filepath = os.path.join(root, file)
+                if os.path.islink(filepath):
+                    filepath = os.readlink(filepath)
+                key = pathlib.PurePath(relroot, file).as_posix()
+                pdfs.append((filepath, key))
+    return pdfs
+
+
+def _inspect_pdf(filepath: str) -> Tuple[str, int]:
+    """Returns SHA1 hash and page count of a pdf file"""
+    hash = hashlib.sha1(usedforsecurity=False)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hash.update(chunk)
+    with pdfium.PdfDocument(filepath) as pdf:
+        return hash.hexdigest(), len(pdf)
+
+
+def _render_pages(filepath: str, pagenos: List[int], pdf_dir: str) -> None:
+    """Renders the given pages of a pdf file as NNN.png files in pdf_dir"""
+    os.makedirs(pdf_dir, exist_ok=True)
+    with pdfium.PdfDocument(filepath) as pdf:
+        for pageno in pagenos:
+            page = pdf.get_page(pageno - 1)
+            try:
+                page.render_topil(scale=RENDER_SCALE).save(
+                    os.path.join(pdf_dir, "%03d.png" % pageno), "PNG"
+                )
+            finally:
+                page.close()
+
+
+def _upload_pages(
+    target: UploadTarget, tmpdirname: str, doc: _Doc, pagenos: List[int]
+) -> None:
+    for pageno in pagenos:
+        filename = "%03d.png" % pageno
+        filepath = os.path.join(tmpdirname, doc.key, filename)
+        target.upload(filepath, "%s/%s" % (doc.key, filename))
+        os.remove(filepath)
+
+
+def _upload_count(target: UploadTarget, tmpdirname: str, doc: _Doc) -> None:
+    filepath = os.path.join(tmpdirname, doc.key, "count")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "w") as f:
+        f.write(str(doc.count))
+    target.upload(filepath, "%s/count" % doc.key)
+    os.remove(filepath)
+
+
+def run(
+    paths: List[str],
+    pos=0,
+    target: Optional[UploadTarget] = None,
+    manifest_path: str = DEFAULT_MANIFEST_PATH,
+    processes: Optional[int] = None,
+    max_pending_pages: int = MAX_PENDING_PAGES,
+) -> None:
+    """Splits pdf files into pages and uploads them for OCR processing
+
+    Each pdf file is uploaded as 1 png per page named "NNN.png" followed by
+    a "count" file holding the number of pages, under a key made of the
+    file path relative to the parent of the given path. Pages are rendered
+    by a process pool and uploaded by a thread pool as soon as they are
+    rendered, while at most max_pending_pages pages wait on disk.
+
+    Uploads are recorded in a manifest so that documents whose content did
+    not change are skipped as long as their count file is still present in
+    the target, and pages uploaded before an interruption are not rendered
+    again.
+
+    Args:
+        paths (list of str):
+            directories containing pdf files
+        pos (int):
+            position of the first progress bar
+        target (UploadTarget):
+            where pages are uploaded. Defaults to None which uploads to
+            the OCR job queue bucket and starts the OCR jobs afterward.
+        manifest_path (str):
+            the manifest file
+        processes (int):
+            number of rendering processes. Defaults to the number of CPUs.
+        max_pending_pages (int):
+            the maximum number of rendered pages kept on disk
+
+    Returns:
+        no value
+    """
+    start_jobs = target is None
+    if target is None:
+        target = BucketTarget(SOURCE_BUCKET)
+    manifest = Manifest(manifest_path)
+    pdfs = _find_pdfs(paths)
+
+    with tempfile.TemporaryDirectory() as tmpdirname, ProcessPoolExecutor(
+        processes
+    ) as renderers, ThreadPoolExecutor(UPLOAD_THREADS) as uploaders:
+        docs = [
+            _Doc(filepath, key, sha1, count)
+            for (filepath, key), (sha1, count) in zip(
+                pdfs,
+                tqdm(
+                    renderers.map(_inspect_pdf, [filepath for filepath, _ in pdfs]),
+                    desc="inspecting pdfs",
+                    total=len(pdfs),
+                    position=pos,
+                    leave=False,
+                ),
+            )
+        ]
+        complete = [doc for doc in docs if manifest.is_complete(target, doc)]
+        for doc, exists in zip(
+            complete,
+            uploaders.map(lambda doc: target.exists("%s/count" % doc.key), complete),
+        ):
+            if not exists:
+                manifest.forget(target, doc)
+
+        tasks = deque()
+        remaining: Dict[str, int] = dict()
+        pending = dict()
+        for doc in docs:
+            if manifest.is_complete(target, doc):
+                continue
+            uploaded = manifest.uploaded_pages(target, doc)
+            pagenos = [i for i in range(1, doc.count + 1) if i not in uploaded]
+            remaining[doc.key] = 0
+            for i in range(0, len(pagenos), PAGES_PER_TASK):
+                tasks.append((doc, pagenos[i : i + PAGES_PER_TASK]))
+                remaining[doc.key] += 1
+            if remaining[doc.key] == 0:
+                fut = uploaders.submit(_upload_count, target, tmpdirname, doc)
+                pending[fut] = ("count", doc, None)
+
+        progress = tqdm(
+            desc="enqueueing pages",
+            total=sum(len(pagenos) for _, pagenos in tasks),
+            position=pos,
+            leave=False,
+        )
+        n_pending_pages = 0
+        while tasks or pending:
+            while tasks and (
+                n_pending_pages == 0
+                or n_pending_pages + len(tasks[0][1]) <= max_pending_pages
             ):
-                relroot = os.path.relpath(root, head)
-                for file in tqdm(files, desc=root, position=pos + 1, leave=False):
-                    if not file.endswith(".pdf"):
-                        continue
-                    filepath = os.path.join(root, file)
-                    if os.path.islink(filepath):
-                        filepath = os.readlink(filepath)
-                    with pdfium.PdfDocument(filepath) as pdf:
-                        pdf_dir = os.path.abspath(
-                            os.path.join(tmpdirname, relroot, file)
-                        )
-                        os.makedirs(pdf_dir, exist_ok=True)
-                        for ind, img in enumerate(
-                            tqdm(
-                                pdf.render_topil(scale=2),
-                                desc="splitting %s" % json.dumps(file),
-                                position=pos + 2,
-                                leave=False,
-                            )
-                        ):
-                            img.save(
-                                os.path.join(pdf_dir, "%03d.png" % (ind + 1,)), "PNG"
-                            )
-                        with open(os.path.join(pdf_dir, "count"), "w") as f:
-                            f.write(str(ind + 1))
-        # remove all named pipes in temp dir which were causing gsutil to hang
-        subprocess.run(["find", tmpdirname, "-type", "p", "-delete"], check=True)
+                doc, pagenos = tasks.popleft()
+                fut = renderers.submit(
+                    _render_pages,
+                    doc.filepath,
+                    pagenos,
+                    os.path.join(tmpdirname, doc.key),
+                )
+                pending[fut] = ("render", doc, pagenos)
+                n_pending_pages += len(pagenos)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, doc, pagenos = pending.pop(fut)
+                fut.result()
+                if kind == "render":
+                    fut = uploaders.submit(
+                        _upload_pages, target, tmpdirname, doc, pagenos
+                    )
+                    pending[fut] = ("upload", doc, pagenos)
+                elif kind == "upload":
+                    n_pending_pages -= len(pagenos)
+                    progress.update(len(pagenos))
+                    manifest.add_pages(target, doc, pagenos)
+                    remaining[doc.key] -= 1
+                    if remaining[doc.key] == 0:
+                        fut = uploaders.submit(_upload_count, target, tmpdirname, doc)
+                        pending[fut] = ("count", doc, None)
+                else:
+                    manifest.complete(target, doc)
+        progress.close()
+    manifest.compact()
+
+    if start_jobs:
         subprocess.run(
             [
-                "gsutil",
-                "-m",
-                "rsync",
+                "bash",
                 "-c",
-                "-i",
-                "-J",
-                "-r",
-                tmpdirname,
-                "gs://%s" % (SOURCE_BUCKET,),
+                f"kubectl kustomize {KUSTOMIZE_DIR} | kubectl apply -f -",
             ],
-            check=True,
         )
-    subprocess.run(
-        [
-            "bash",
-            "-c",
-            f"kubectl kustomize {KUSTOMIZE_DIR} | kubectl apply -f -",
-        ],
-    )
 
 
 if __name__ == "__main__":
@@ -87,6 +455,36 @@ if __name__ == "__main__":
         nargs="+",
         help="a path that contain PDF files to be enqueued. Files that already exist in the queue will be ignored.",
     )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=DEFAULT_MANIFEST_PATH,
+        help="file recording pages that were already enqueued.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="number of processes rendering pages. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--max-pending-pages",
+        type=int,
+        default=MAX_PENDING_PAGES,
+        help="maximum number of rendered pages waiting on disk to be uploaded.",
+    )
+    parser.add_argument(
+        "--target-dir",
+        type=str,
+        default=None,
+        help="copy pages to this directory instead of the OCR job queue bucket.",
+    )
     args = parser.parse_args()
 
-    run(args.paths)
+    run(
+        args.paths,
+        target=None if args.target_dir is None else LocalDirTarget(args.target_dir),
+        manifest_path=args.manifest,
+        processes=args.processes,
+        max_pending_pages=args.max_pending_pages,
+    )
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+import pypdfium2 as pdfium
+from PIL import Image
+
+from lib.queue_pdf_for_ocr import LocalDirTarget, UploadTarget, run
+
+
+class CountingTarget(LocalDirTarget):
+    def __init__(self, root: str) -> None:
+        super().__init__(root)
+        self.keys = []
+
+    def upload(self, filepath: str, key: str) -> None:
+        super().upload(filepath, key)
+        self.keys.append(key)
+
+
+def write_pdf(filepath: str, n_pages: int) -> None:
+    pdf = pdfium.PdfDocument.new()
+    for i in range(n_pages):
+        pdf.new_page(100 + i, 200)
+    with open(filepath, "wb") as f:
+        pdf.save(f)
+    pdf.close()
+
+
+class RunTestCase(unittest.TestCase):
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as dir:
+            src = os.path.join(dir, "ocr")
+            os.makedirs(os.path.join(src, "ab"))
+            write_pdf(os.path.join(src, "ab", "cd.pdf"), 5)
+            write_pdf(os.path.join(src, "ab", "ef.pdf"), 2)
+            dst = os.path.join(dir, "bucket")
+            manifest_path = os.path.join(dir, "manifest.jsonl")
+
+            def run_with(target):
+                run(
+                    [src],
+                    target=target,
+                    manifest_path=manifest_path,
+                    processes=2,
+                    max_pending_pages=2,
+                )
+
+            target = CountingTarget(dst)
+            run_with(target)
+            self.assertEqual(
+                sorted(target.keys),
+                ["ocr/ab/cd.pdf/%03d.png" % i for i in range(1, 6)]
+                + ["ocr/ab/cd.pdf/count"]
+                + ["ocr/ab/ef.pdf/%03d.png" % i for i in range(1, 3)]
+                + ["ocr/ab/ef.pdf/count"],
+            )
+            # count files are uploaded after all pages of their document
+            self.assertGreater(
+                target.keys.index("ocr/ab/cd.pdf/count"),
+                max(
+                    target.keys.index("ocr/ab/cd.pdf/%03d.png" % i) for i in range(1, 6)
+                ),
+            )
+            with open(os.path.join(dst, "ocr/ab/cd.pdf/count")) as f:
+                self.assertEqual(f.read(), "5")
+            with Image.open(os.path.join(dst, "ocr/ab/cd.pdf/002.png")) as img:
+                self.assertEqual(img.size, (202, 400))
+
+            # unchanged documents are skipped
+            target = CountingTarget(dst)
+            run_with(target)
+            self.assertEqual(target.keys, [])
+
+            # documents that changed or were removed from the target are
+            # enqueued again
+            write_pdf(os.path.join(src, "ab", "cd.pdf"), 1)
+            os.remove(os.path.join(dst, "ocr/ab/ef.pdf/count"))
+            target = CountingTarget(dst)
+            run_with(target)
+            self.assertEqual(
+                sorted(target.keys),
+                [
+                    "ocr/ab/cd.pdf/001.png",
+                    "ocr/ab/cd.pdf/count",
+                    "ocr/ab/ef.pdf/001.png",
+                    "ocr/ab/ef.pdf/002.png",
+                    "ocr/ab/ef.pdf/count",
+                ],
+            )
+
+
+class LocalDirTargetTestCase(unittest.TestCase):
+    def test_list_dirs(self):
+        with tempfile.TemporaryDirectory() as dir:
+            target = LocalDirTarget(dir)
+            with tempfile.NamedTemporaryFile() as f:
+                target.upload(f.name, "ocr/ab/cd.pdf/001.png")
+                target.upload(f.name, "ocr/ab/ef.pdf/count")
+                target.upload(f.name, "ocr/ab/file")
+            self.assertEqual(
+                target.list_dirs("ocr/ab/"), ["ocr/ab/cd.pdf/", "ocr/ab/ef.pdf/"]
+            )
+            self.assertEqual(target.list_dirs("ocr/cd/"), [])
+
+
+class UploadTargetTestCase(unittest.TestCase):
+    def test_missing_method(self):
+        class UploadOnlyTarget(UploadTarget):
+            def upload(self, filepath: str, key: str) -> None:
+                pass
+
+        with self.assertRaises(TypeError):
+            UploadOnlyTarget()
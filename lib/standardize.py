@@ -1,6 +1,69 @@
+from collections import deque
+import functools
+
+import numpy as np
 import pandas as pd
 
 
+class _Automaton(object):
+    """Aho-Corasick automaton that finds every occurrence of a set of sequences in a single pass."""
+
+    def __init__(self, seqs: list[str]):
+        self._lens = [len(s) for s in seqs]
+        self._goto = [dict()]
+        self._fail = [0]
+        self._out = [[]]
+        for ind, seq in enumerate(seqs):
+            node = 0
+            for ch in seq:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append(dict())
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._out[node].append(ind)
+        queue = deque(self._goto[0].values())
+        while len(queue) > 0:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail != 0 and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, s: str) -> list[tuple[int, int]]:
+        """Returns (sequence index, start position) of every occurrence in s"""
+        goto, fail, out, lens = self._goto, self._fail, self._out, self._lens
+        result = []
+        node = 0
+        for i, ch in enumerate(s):
+            while node != 0 and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for ind in out[node]:
+                result.append((ind, i + 1 - lens[ind]))
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_lookup_table(lookup_table: tuple[tuple[str]]):
+    # create list of sequences sorted by length, a lower index means a higher priority
+    table = []
+    for i, seqs in enumerate(lookup_table):
+        for s in seqs:
+            if len(s) == 0:
+                raise ValueError("empty sequence found in lookup table")
+            table.append((len(s), s, i))
+    table.sort(key=lambda x: x[0], reverse=True)
+    sorted_lens, sorted_seqs, sorted_inds = zip(*table)
+    return _Automaton(sorted_seqs), sorted_lens, sorted_inds
+
+
 def standardize_from_lookup_table(
     df: pd.DataFrame, col: str, lookup_table: list[list[str]], quiet: bool = False
 ) -> pd.DataFrame:
@@ -18,6 +81,10 @@ def standardize_from_lookup_table(
     ]
     The strings "sydney uni", "university sydney" will be replaced with "the university of sydney"
 
+    Each cell is split recursively: the longest sequence found anywhere in the cell is replaced,
+    then the text before and after it is processed the same way. The lookup table is compiled
+    once into a cached Aho-Corasick automaton and each distinct cell value is matched only once.
+
     This function also prints unmatched strings after a successful run
 
     Args:
@@ -35,52 +102,44 @@ def standardize_from_lookup_table(
     Returns:
         the processed frame
     """
-    # create list of sequences sorted by length
-    table = []
-    for i, seqs in enumerate(lookup_table):
-        for s in seqs:
-            if len(s) == 0:
-                raise ValueError("empty sequence found in lookup table")
-            table.append((len(s), s, i))
-    table.sort(key=lambda x: x[0], reverse=True)
-    sorted_lens, sorted_seqs, sorted_inds = zip(*table)
+    automaton, sorted_lens, sorted_inds = _compile_lookup_table(
+        tuple(tuple(seqs) for seqs in lookup_table)
+    )
 
     unmatched_seqs = set()
 
     def find_seq(s):
         if pd.isna(s):
             return []
+        # every occurrence of every sequence, ordered by priority then position
+        occurrences = sorted(automaton.find_all(s))
         seqs = []
         sub_ranges = [(0, len(s))]
         while len(sub_ranges) > 0:
             start, end = sub_ranges.pop()
-            sub_str = s[start:end]
-            str_len = len(sub_str)
-            for start_ind, n in enumerate(sorted_lens):
-                if n <= str_len:
-                    break
-            for i, seq in enumerate(sorted_seqs[start_ind:]):
-                try:
-                    pat_start_ind = sub_str.index(seq)
+            for i, pat_start_ind in occurrences:
+                if pat_start_ind >= start and pat_start_ind + sorted_lens[i] <= end:
                     break
-                except ValueError:
-                    pass
             else:
-                unmatched_seqs.add(sub_str)
+                unmatched_seqs.add(s[start:end])
                 continue
-            i = i + start_ind
-            seqs.append((start + pat_start_ind, sorted_inds[i]))
-            if pat_start_ind > 0:
-                sub_ranges.append((start, start + pat_start_ind))
+            seqs.append((pat_start_ind, sorted_inds[i]))
+            if pat_start_ind > start:
+                sub_ranges.append((start, pat_start_ind))
             pat_end_ind = pat_start_ind + sorted_lens[i]
-            if pat_end_ind < str_len:
-                sub_ranges.append((start + pat_end_ind, end))
+            if pat_end_ind < end:
+                sub_ranges.append((pat_end_ind, end))
         return [ind for _, ind in sorted(seqs, key=lambda x: x[0])]
 
     def join_seqs(seqs):
         return "; ".join(list(map(lambda x: lookup_table[x][0], seqs)))
 
-    df.loc[:, col] = df[col].map(find_seq).map(join_seqs)
+    # match each distinct value only once
+    codes, uniques = pd.factorize(df[col])
+    results = np.array(
+        [join_seqs(find_seq(s)) for s in uniques] + [join_seqs([])], dtype=object
+    )
+    df.loc[:, col] = pd.Series(results[codes], index=df.index)
 
     if not quiet:
         print(
@@ -1,4 +1,8 @@
+import ast
+from io import StringIO
+from contextlib import redirect_stdout
 from pandas.testing import assert_series_equal
+import numpy as np
 import pandas as pd
 import unittest
 from standardize import standardize_from_lookup_table
@@ -36,3 +40,28 @@ class StandardizeFromLookupTableTestCase(unittest.TestCase):
             ),
             check_names=False,
         )
+
+    def test_standardize_repeated_values(self):
+        df = pd.DataFrame(
+            [["sus - sus 10"], [np.NaN], ["sus - sus 10"], ["sus 1"]],
+            columns=["disposition"],
+        )
+        with redirect_stdout(StringIO()) as f:
+            df2 = standardize_from_lookup_table(
+                df,
+                "disposition",
+                [["sustained", "sus"], ["10 days suspension", "sus 10"]],
+            )
+        assert_series_equal(
+            df2.disposition,
+            pd.Series(
+                [
+                    "sustained; 10 days suspension",
+                    "",
+                    "sustained; 10 days suspension",
+                    "sustained",
+                ]
+            ),
+            check_names=False,
+        )
+        self.assertEqual(ast.literal_eval(f.getvalue().split("\n  ")[1]), {" - ", " 1"})
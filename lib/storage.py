@@ -0,0 +1,312 @@
+import hashlib
+import os
+import pathlib
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+PARQUET_COMPRESSION = "zstd"
+
+# inferred types of object columns that can be stored as is in a parquet file
+_parquet_object_types = {"string", "empty", "bytes", "boolean", "date", "datetime"}
+
+
+def _is_parquet(path: pathlib.Path) -> bool:
+    return pathlib.Path(path).suffix == ".parquet"
+
+
+def _normalize_object_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts values of mixed type object columns to strings
+
+    Parquet columns must have a single type while CSV columns hold anything,
+    so mixed columns are stored the way they would be written to CSV. Missing
+    values are left alone.
+    """
+    cols = [
+        col
+        for col in df.columns
+        if df[col].dtype == object
+        and pd.api.types.infer_dtype(df[col], skipna=True) not in _parquet_object_types
+    ]
+    if len(cols) == 0:
+        return df
+    df = df.copy()
+    for col in cols:
+        df.loc[:, col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def _restore_missing_values(df: pd.DataFrame) -> pd.DataFrame:
+    """Replaces None in object columns with np.nan
+
+    Missing values of object columns come back from parquet as None, which
+    astype(str) and str.cat turn into "None" instead of the "nan" that a CSV
+    round trip gives, changing uids and comparisons.
+    """
+    for col in df.columns[df.dtypes == object]:
+        missing = df[col].isna().to_numpy()
+        if missing.any():
+            values = df[col].to_numpy(copy=True)
+            values[missing] = np.nan
+            df[col] = values
+    return df
+
+
+def write_frame(df: pd.DataFrame, path: pathlib.Path, **kwargs) -> None:
+    """Writes an intermediate frame to the data directory
+
+    The storage format is picked from the file extension: ".parquet" files
+    are written as typed, compressed columnar files while any other file is
+    written with to_csv. Stages should only write ".parquet" files for data
+    that is read back by other stages. Published targets such as fuse/*.csv
+    stay CSV files.
+
+    Args:
+        df (pd.DataFrame):
+            the frame to write
+        path (pathlib.Path):
+            the destination file, usually returned by deba.data
+        kwargs:
+            extra arguments passed to to_parquet or to_csv
+
+    Returns:
+        no value
+    """
+    if _is_parquet(path):
+        _normalize_object_columns(df).to_parquet(
+            path,
+            index=False,
+            compression=kwargs.pop("compression", PARQUET_COMPRESSION),
+            **kwargs
+        )
+    else:
+        df.to_csv(path, **{"index": False, **kwargs})
+
+
+def read_frame(path: pathlib.Path, **kwargs) -> pd.DataFrame:
+    """Reads an intermediate frame written by write_frame
+
+    Parquet files keep the column types they were written with, so unlike
+    CSV files integer columns do not come back as floats when they have
+    missing values and string columns are not re-inferred as numbers.
+    Missing values of object columns are np.nan, as read_csv gives them.
+
+    Args:
+        path (pathlib.Path):
+            the file to read, usually returned by deba.data
+        kwargs:
+            extra arguments passed to read_parquet or read_csv
+
+    Returns:
+        the frame
+    """
+    if _is_parquet(path):
+        return _restore_missing_values(pd.read_parquet(path, **kwargs))
+    return pd.read_csv(path, **kwargs)
+
+
+def _file_sha1(path: pathlib.Path) -> str:
+    hash = hashlib.sha1(usedforsecurity=False)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hash.update(chunk)
+    return hash.hexdigest()
+
+
+class _Partition(typing.NamedTuple):
+    path: pathlib.Path
+    kwargs: dict
+    sha1: str
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_csv(self.path, **self.kwargs)
+
+
+class PartitionCache(object):
+    """Caches frames processed from input files
+
+    Each cached frame is keyed by the content of its input file, the name of
+    the function that processed it and the content of the given dependency
+    files, so changing any of them causes the frame to be processed again.
+    Only the latest frame of each input file is kept.
+    """
+
+    def __init__(self, cache_dir: str, dependencies: list[str]) -> None:
+        """Creates a new instance of PartitionCache
+
+        Args:
+            cache_dir (str):
+                the directory to store cached frames in
+            dependencies (list[str]):
+                files whose content determines how frames are processed,
+                such as the modules defining the processing functions
+
+        Returns:
+            no value
+        """
+        self._dir = pathlib.Path(cache_dir)
+        hash = hashlib.sha1(usedforsecurity=False)
+        for path in sorted(dependencies):
+            hash.update(_file_sha1(path).encode("utf-8"))
+        self._version = hash.hexdigest()
+
+    def get(
+        self,
+        partition: _Partition,
+        process: typing.Callable[[pd.DataFrame], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Returns the processed frame of a partition, processing it if needed
+
+        Args:
+            partition (_Partition):
+                the input file to process
+            process (Callable):
+                the function that processes the frame read from the file
+
+        Returns:
+            the processed frame
+        """
+        stem = pathlib.Path(partition.path).stem
+        key = hashlib.sha1(
+            ("%s %s" % (partition.sha1, self._version)).encode("utf-8"),
+            usedforsecurity=False,
+        ).hexdigest()
+        parent = self._dir / process.__name__
+        cache_path = parent / ("%s.%s.pkl" % (stem, key))
+        if cache_path.exists():
+            return pd.read_pickle(cache_path)
+
+        df = partition.read()
+        # columns without any value are read as float columns, which the
+        # string functions used by process would reject. When the frame is
+        # processed together with other frames these columns are objects.
+        for col in df.columns[df.isna().all()]:
+            df[col] = df[col].astype(object)
+        df = process(df)
+
+        parent.mkdir(parents=True, exist_ok=True)
+        for stale_path in parent.glob("%s.*.pkl" % stem):
+            stale_path.unlink()
+        tmp_path = cache_path.with_suffix(".tmp")
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+        return df
+
+
+class ParallelReader(object):
+    """Reads data files in background threads
+
+    Files are submitted one call at a time so that deba can still discover
+    each of them as a prerequisite, e.g. with
+    `reader.read_csv(deba.data("fuse/per_brusly_pd.csv"))`. Reads run while
+    other files are being submitted or processed and concat joins the
+    results in submission order.
+
+    If a PartitionCache is given, read_csv only hashes the file and
+    rearrange reuses the processed frame of every file that did not change
+    since the last run.
+    """
+
+    def __init__(
+        self, max_workers: int = 8, cache: typing.Optional[PartitionCache] = None
+    ) -> None:
+        """Creates a new instance of ParallelReader
+
+        Args:
+            max_workers (int):
+                the maximum number of files read at the same time
+            cache (PartitionCache):
+                the cache of processed frames. Defaults to None which
+                disables caching.
+
+        Returns:
+            no value
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cache = cache
+
+    def read_csv(self, path: pathlib.Path, **kwargs) -> Future:
+        """Starts reading a CSV file
+
+        Args:
+            path (pathlib.Path):
+                the file to read, usually returned by deba.data
+            kwargs:
+                extra arguments passed to pd.read_csv
+
+        Returns:
+            a future of the read frame. The frame is read lazily if caching
+            is enabled.
+        """
+        if self._cache is None:
+            return self._executor.submit(pd.read_csv, path, **kwargs)
+        return self._executor.submit(lambda: _Partition(path, kwargs, _file_sha1(path)))
+
+    def _frame(self, future: Future) -> pd.DataFrame:
+        result = future.result()
+        if isinstance(result, _Partition):
+            return result.read()
+        return result
+
+    def concat(self, futures: list[Future], **kwargs) -> pd.DataFrame:
+        """Waits for the given reads and concatenates their frames
+
+        Frames are concatenated in the order of futures regardless of which
+        read finishes first, so the result is the same as reading the files
+        one by one.
+
+        Args:
+            futures (list[Future]):
+                futures returned by read_csv
+            kwargs:
+                extra arguments passed to pd.concat
+
+        Returns:
+            the concatenated frame
+        """
+        return pd.concat([self._frame(future) for future in futures], **kwargs)
+
+    def rearrange(
+        self,
+        process: typing.Callable[[pd.DataFrame], pd.DataFrame],
+        futures: list[Future],
+    ) -> pd.DataFrame:
+        """Concatenates the given reads and processes the result
+
+        Without a cache this is process(concat(futures)). With a cache, each
+        file is processed on its own and the cached result is reused until
+        the file changes. The processed frames are concatenated in order and
+        processed once more, which repeats the steps that span files such as
+        dropping duplicates, validating and sorting. Unchanged files are
+        neither parsed again nor carry their unused columns into this pass.
+
+        Args:
+            process (Callable):
+                a function such as rearrange_personnel_columns. It must give
+                the same result when applied again to its own output, which
+                means sorting with a stable algorithm so that tied rows keep
+                the order of the files.
+            futures (list[Future]):
+                futures returned by read_csv
+
+        Returns:
+            the processed frame
+        """
+        if self._cache is None:
+            return process(self.concat(futures))
+        return process(
+            pd.concat(
+                [
+                    future.result()
+                    for future in [
+                        self._executor.submit(
+                            self._cache.get, partition.result(), process
+                        )
+                        for partition in futures
+                    ]
+                ]
+            )
+        )
@@ -0,0 +1,161 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from lib.columns import rearrange_citizen_columns
+from lib.storage import ParallelReader, PartitionCache, read_frame, write_frame
+
+
+class StorageTestCase(unittest.TestCase):
+    def test_parquet_round_trip(self):
+        df = pd.DataFrame(
+            {
+                "uid": ["001", "002", "003"],
+                "year": pd.Series([2001, None, 2003], dtype="Int64"),
+                "mixed": [1973, "abc", np.nan],
+            }
+        )
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "a.parquet")
+            write_frame(df, path)
+            assert_frame_equal(
+                read_frame(path),
+                pd.DataFrame(
+                    {
+                        "uid": ["001", "002", "003"],
+                        "year": pd.Series([2001, None, 2003], dtype="Int64"),
+                        "mixed": ["1973", "abc", np.nan],
+                    }
+                ),
+            )
+            self.assertEqual(df["mixed"].to_list()[:2], [1973, "abc"])
+
+    def test_parquet_missing_values_same_as_csv(self):
+        df = pd.DataFrame(
+            {
+                "uid": ["001", "002", "003"],
+                "name": ["john", np.nan, np.nan],
+                "middle_name": pd.Series([np.nan, np.nan, np.nan], dtype=object),
+                "mixed": [1973, "abc", np.nan],
+            }
+        )
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "a.parquet")
+            write_frame(df, path)
+            result = read_frame(path)
+            assert_frame_equal(result.astype(str), df.astype(str))
+            self.assertTrue(result.middle_name.isna().all())
+            self.assertIs(result.name[2], np.nan)
+
+    def test_csv(self):
+        df = pd.DataFrame({"uid": ["001", "002"], "name": ["john", "anne"]})
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "a.csv")
+            write_frame(df, path)
+            assert_frame_equal(
+                read_frame(path),
+                pd.DataFrame({"uid": [1, 2], "name": ["john", "anne"]}),
+            )
+
+
+class ParallelReaderTestCase(unittest.TestCase):
+    def test_concat(self):
+        dfs = [
+            pd.DataFrame({"uid": ["a%d" % i, "b%d" % i], "year": [2000 + i, None]})
+            for i in range(20)
+        ]
+        reader = ParallelReader(max_workers=4)
+        with tempfile.TemporaryDirectory() as dir:
+            futures = []
+            for i, df in enumerate(dfs):
+                path = os.path.join(dir, "%d.csv" % i)
+                df.to_csv(path, index=False)
+                futures.append(reader.read_csv(path))
+            assert_frame_equal(
+                reader.concat(futures, ignore_index=True),
+                pd.concat(dfs, ignore_index=True),
+            )
+
+    def test_rearrange_with_cache(self):
+        def process(df):
+            return (
+                df[df.uid.notna()]
+                .drop_duplicates(subset=["uid"])
+                .assign(name=lambda df: df.name.str.title())
+                .sort_values("uid", ignore_index=True)
+            )
+
+        dfs = [
+            pd.DataFrame({"uid": ["b", "a", "b"], "name": ["john", "anne", "jim"]}),
+            pd.DataFrame({"uid": ["a", None], "name": [np.nan, np.nan]}),
+            pd.DataFrame({"uid": ["c"], "name": ["bill"]}),
+        ]
+        with tempfile.TemporaryDirectory() as dir:
+            paths = [os.path.join(dir, "%d.csv" % i) for i in range(len(dfs))]
+            for df, path in zip(dfs, paths):
+                df.to_csv(path, index=False)
+            dep_path = os.path.join(dir, "dep.py")
+            with open(dep_path, "w") as f:
+                f.write("")
+            cache_dir = os.path.join(dir, "cache")
+
+            def rearrange(cache):
+                reader = ParallelReader(cache=cache)
+                return reader.rearrange(
+                    process, [reader.read_csv(path) for path in paths]
+                )
+
+            expected = pd.DataFrame(
+                {"uid": ["a", "b", "c"], "name": ["Anne", "John", "Bill"]}
+            )
+            assert_frame_equal(rearrange(None), expected)
+            for _ in range(2):
+                assert_frame_equal(
+                    rearrange(PartitionCache(cache_dir, [dep_path])), expected
+                )
+            self.assertEqual(len(os.listdir(os.path.join(cache_dir, "process"))), 3)
+
+            pd.DataFrame({"uid": ["c"], "name": ["cate"]}).to_csv(paths[2], index=False)
+            assert_frame_equal(
+                rearrange(PartitionCache(cache_dir, [dep_path])),
+                pd.DataFrame(
+                    {"uid": ["a", "b", "c"], "name": ["Anne", "John", "Cate"]}
+                ),
+            )
+            self.assertEqual(len(os.listdir(os.path.join(cache_dir, "process"))), 3)
+
+    def test_rearrange_with_cache_same_as_full_run(self):
+        rng = np.random.default_rng(0)
+        with tempfile.TemporaryDirectory() as dir:
+            paths = []
+            for i in range(3):
+                path = os.path.join(dir, "%d.csv" % i)
+                pd.DataFrame(
+                    {
+                        "citizen_uid": ["c%d-%d" % (i, j) for j in range(200)],
+                        "complainant_sex": rng.choice(["male", "female"], 200),
+                        "agency": rng.choice(["baker-pd", "hammond-pd"], 200),
+                    }
+                ).to_csv(path, index=False)
+                paths.append(path)
+            dep_path = os.path.join(dir, "dep.py")
+            with open(dep_path, "w") as f:
+                f.write("")
+
+            def rearrange(cache):
+                reader = ParallelReader(cache=cache)
+                return reader.rearrange(
+                    rearrange_citizen_columns,
+                    [reader.read_csv(path) for path in paths],
+                ).reset_index(drop=True)
+
+            expected = rearrange(None)
+            for _ in range(2):
+                assert_frame_equal(
+                    rearrange(PartitionCache(os.path.join(dir, "cache"), [dep_path])),
+                    expected,
+                )
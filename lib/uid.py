@@ -1,5 +1,7 @@
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 import pandas as pd
 
 import deba
@@ -23,11 +25,54 @@ def gen_uid_from_dict(d: dict, id_keys: list[str]) -> str:
     ).hexdigest()
 
 
+HASH_CHUNK_SIZE = 200000
+
+
+def _md5_hexdigests(keys: list[str]) -> list[str]:
+    md5 = hashlib.md5
+    return [md5(key.encode("utf-8")).hexdigest() for key in keys]
+
+
+def md5_hexdigests(keys: np.ndarray, processes: int = 1) -> np.ndarray:
+    """Hashes an array of strings with MD5 in chunks
+
+    Args:
+        keys (np.ndarray):
+            the strings to hash
+        processes (int):
+            number of worker processes. Chunks are hashed in a process pool
+            when this is greater than 1 and there is more than one chunk.
+            Defaults to 1
+
+    Returns:
+        array of MD5 hex digests
+    """
+    chunks = [
+        keys[start : start + HASH_CHUNK_SIZE].tolist()
+        for start in range(0, len(keys), HASH_CHUNK_SIZE)
+    ]
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(min(processes, len(chunks))) as executor:
+            digests = list(executor.map(_md5_hexdigests, chunks))
+    else:
+        digests = [_md5_hexdigests(chunk) for chunk in chunks]
+    result = np.empty(len(keys), dtype=object)
+    start = 0
+    for chunk in digests:
+        result[start : start + len(chunk)] = chunk
+        start += len(chunk)
+    return result
+
+
 def gen_uid(
-    df: pd.DataFrame, id_cols: list[str], uid_name: str = "uid"
+    df: pd.DataFrame, id_cols: list[str], uid_name: str = "uid", processes: int = 1
 ) -> pd.DataFrame:
     """Generates a uid (MD5 hash) column from a list of identifier columns
 
+    The identifier columns are converted to strings and joined with ", "
+    column by column. Each distinct joined key is hashed only once and the
+    digests are broadcast back to every row.
+
     Args:
         df (pd.DataFrame):
             the frame to process
@@ -35,6 +80,9 @@ def gen_uid(
             the identifier columns
         uid_name: (str):
             uid column name. Defaults to "uid"
+        processes (int):
+            number of worker processes to hash with, only worth it for
+            very large frames. Defaults to 1
 
     Returns:
         the updated frame
@@ -43,18 +91,35 @@ def gen_uid(
         HashCollisionException:
             there's a hash collision
     """
-    df.loc[:, uid_name] = (
-        df[id_cols]
-        .astype("str")
-        .agg(", ".join, axis=1)
-        .map(lambda x: hashlib.md5(x.encode("utf-8")).hexdigest())
-    )
-    uniq_df = df[[uid_name] + id_cols].drop_duplicates()
-    if uniq_df[uid_name].duplicated().any():
+    strs = df[id_cols].astype("str")
+    if strs.shape[1] == 0:
+        keys = pd.Series("", index=df.index)
+    else:
+        keys = strs.iloc[:, 0].str.cat(
+            [strs.iloc[:, i] for i in range(1, strs.shape[1])], sep=", "
+        )
+    codes, uniq_keys = pd.factorize(keys.to_numpy(dtype=object))
+    digests = md5_hexdigests(uniq_keys, processes)
+    uids = digests[codes]
+    # distinct id tuples must have distinct uids, which fails on a hash
+    # collision but also when joined keys are ambiguous, e.g. for
+    # ("a, b", "c") and ("a", "b, c") or for NaN and "nan"
+    if len(id_cols) == 0:
+        firsts = np.arange(len(df)) == 0
+    else:
+        firsts = ~df[id_cols].duplicated().to_numpy()
+    tuple_uids = pd.Index(uids[firsts])
+    if not tuple_uids.is_unique:
+        collided = firsts & np.isin(uids, tuple_uids[tuple_uids.duplicated()])
         raise HashCollisionException(
             "uid hash collide!\n%s"
-            % (uniq_df[uniq_df[uid_name].duplicated(keep=False)].to_string())
+            % (
+                df.loc[collided, id_cols]
+                .assign(**{uid_name: uids[collided]})
+                .to_string()
+            )
         )
+    df.loc[:, uid_name] = pd.Series(uids, index=df.index, dtype=object)
     return df
 
 
@@ -1,5 +1,8 @@
+from unittest import mock
+import uid
 from uid import gen_uid, gen_uid_from_dict, ensure_uid_unique
 from pandas.testing import assert_series_equal
+import numpy as np
 import pandas as pd
 import unittest
 
@@ -19,6 +22,41 @@ class UIDTestCase(unittest.TestCase):
             ),
         )
 
+    def test_gen_uid_mixed_types(self):
+        dfa = pd.DataFrame(
+            [["abc", 1, 2.5], ["abc", 1, 2.5], [np.NaN, 3, np.NaN], ["ăbc", 4, 0.1]],
+            columns=["a", "b", "c"],
+        )
+        expected = [
+            gen_uid_from_dict(rec, ["a", "b", "c"])
+            for rec in dfa.astype(object).to_dict("records")
+        ]
+        with mock.patch.object(uid, "HASH_CHUNK_SIZE", 2):
+            for processes in [1, 2]:
+                self.assertEqual(
+                    gen_uid(
+                        dfa.copy(), ["a", "b", "c"], processes=processes
+                    ).uid.to_list(),
+                    expected,
+                )
+
+    def test_gen_uid_hash_collision(self):
+        dfa = pd.DataFrame([[1, 2], [3, 4], [1, 2]], columns=["a", "b"])
+        with mock.patch.object(
+            uid, "_md5_hexdigests", lambda keys: ["same"] * len(keys)
+        ):
+            with self.assertRaisesRegex(Exception, r"uid hash collide!"):
+                gen_uid(dfa, ["a", "b"])
+
+    def test_gen_uid_ambiguous_keys(self):
+        for rows in [
+            [["x, y", "z"], ["x", "y, z"]],
+            [[np.nan, "z"], ["nan", "z"]],
+        ]:
+            dfa = pd.DataFrame(rows + rows, columns=["a", "b"])
+            with self.assertRaisesRegex(Exception, r"uid hash collide!"):
+                gen_uid(dfa, ["a", "b"])
+
     def test_gen_uid_from_dict(self):
         obj = {"a": 1, "b": 2, "c": 3}
         self.assertEqual(
@@ -1,5 +1,6 @@
 import deba
-from datamatch import ColumnsIndex, JaroWinklerSimilarity, ThresholdMatcher
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 
@@ -1,9 +1,5 @@
-from datamatch import (
-    ColumnsIndex,
-    JaroWinklerSimilarity,
-    StringSimilarity,
-    ThresholdMatcher,
-)
+from datamatch import StringSimilarity, ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 import deba
@@ -1,6 +1,7 @@
 import deba
 from lib.post import load_for_agency
-from datamatch import ColumnsIndex, JaroWinklerSimilarity, ThresholdMatcher
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 
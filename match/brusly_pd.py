@@ -1,4 +1,5 @@
-from datamatch import ThresholdMatcher, NoopIndex, JaroWinklerSimilarity
+from datamatch import ThresholdMatcher, NoopIndex
+from lib.match import JaroWinklerSimilarity
 import pandas as pd
 
 import deba
@@ -1,9 +1,5 @@
-from datamatch import (
-    ThresholdMatcher,
-    JaroWinklerSimilarity,
-    ColumnsIndex,
-    DateSimilarity,
-)
+from datamatch import ThresholdMatcher, DateSimilarity
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 import deba
@@ -1,5 +1,6 @@
 import deba
-from datamatch import ThresholdMatcher, JaroWinklerSimilarity, ColumnsIndex
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 from lib.post import extract_events_from_post, load_for_agency
 import pandas as pd
 
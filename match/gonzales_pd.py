@@ -1,10 +1,6 @@
 import pandas as pd
-from datamatch import (
-    ThresholdMatcher,
-    JaroWinklerSimilarity,
-    ColumnsIndex,
-    DateSimilarity,
-)
+from datamatch import ThresholdMatcher, DateSimilarity
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import deba
 from lib.date import combine_date_columns
 from lib.post import extract_events_from_post, load_for_agency
@@ -1,4 +1,5 @@
-from datamatch import ThresholdMatcher, JaroWinklerSimilarity, ColumnsIndex
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import deba
 from lib.post import load_for_agency
 import pandas as pd
@@ -1,6 +1,7 @@
 import pandas as pd
 import deba
-from datamatch import JaroWinklerSimilarity, ThresholdMatcher, ColumnsIndex
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 from lib.clean import canonicalize_officers
 from lib.post import load_for_agency, extract_events_from_post
 
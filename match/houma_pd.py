@@ -1,6 +1,7 @@
 import deba
 import pandas as pd
-from datamatch import JaroWinklerSimilarity, ThresholdMatcher, ColumnsIndex
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 from lib.post import load_for_agency
 from lib.clean import canonicalize_officers
 
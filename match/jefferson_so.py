@@ -1,6 +1,5 @@
-from datamatch.indices import ColumnsIndex
-
-from datamatch import ThresholdMatcher, JaroWinklerSimilarity
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 import deba
 from lib.post import extract_events_from_post, load_for_agency
@@ -1,7 +1,8 @@
 from lib.clean import names_to_title_case
 
 import pandas as pd
-from datamatch import ThresholdMatcher, JaroWinklerSimilarity, ColumnsIndex, NoopIndex
+from datamatch import ThresholdMatcher, NoopIndex
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 
 import deba
 from lib.post import extract_events_from_post, load_for_agency
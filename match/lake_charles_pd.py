@@ -1,5 +1,6 @@
 import pandas as pd
-from datamatch import JaroWinklerSimilarity, ThresholdMatcher, ColumnsIndex
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import deba
 from lib.post import load_for_agency, extract_events_from_post
 from lib.clean import canonicalize_officers
@@ -1,12 +1,7 @@
 from datetime import datetime
 
-from datamatch import (
-    ThresholdMatcher,
-    JaroWinklerSimilarity,
-    ColumnsIndex,
-    Swap,
-    NonOverlappingFilter,
-)
+from datamatch import ThresholdMatcher, Swap, NonOverlappingFilter
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 import deba
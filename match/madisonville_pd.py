@@ -1,4 +1,5 @@
-from datamatch import ThresholdMatcher, NoopIndex, JaroWinklerSimilarity, ColumnsIndex
+from datamatch import ThresholdMatcher, NoopIndex
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 import deba
@@ -1,9 +1,5 @@
-from datamatch import (
-    ThresholdMatcher,
-    ColumnsIndex,
-    JaroWinklerSimilarity,
-    DateSimilarity,
-)
+from datamatch import ThresholdMatcher, DateSimilarity
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 from lib.date import combine_date_columns
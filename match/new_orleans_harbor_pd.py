@@ -1,4 +1,5 @@
-from datamatch import ThresholdMatcher, ColumnsIndex, JaroWinklerSimilarity
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import pandas as pd
 
 import deba
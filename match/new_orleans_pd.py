@@ -1,11 +1,7 @@
 from lib.date import combine_date_columns
 import deba
-from datamatch import (
-    ThresholdMatcher,
-    JaroWinklerSimilarity,
-    DateSimilarity,
-    ColumnsIndex,
-)
+from datamatch import ThresholdMatcher, DateSimilarity
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 from lib.post import extract_events_from_post, load_for_agency
 import pandas as pd
 from lib.clean import canonicalize_officers, float_to_int_str, standardize_desc_cols
@@ -1,5 +1,6 @@
 from lib.date import combine_date_columns
-from datamatch import ThresholdMatcher, JaroWinklerSimilarity, NoopIndex, DateSimilarity
+from datamatch import ThresholdMatcher, NoopIndex, DateSimilarity
+from lib.match import JaroWinklerSimilarity
 import deba
 from lib.post import extract_events_from_post, load_for_agency
 import pandas as pd
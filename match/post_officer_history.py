@@ -1,11 +1,8 @@
 import warnings
 import deba
 import pandas as pd
-from datamatch import (
-    JaroWinklerSimilarity,
-    ThresholdMatcher,
-    ColumnsIndex,
-)
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 
 
 def match_post_to_personnel(post, personnel):
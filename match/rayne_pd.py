@@ -1,5 +1,6 @@
 import pandas as pd
-from datamatch import ThresholdMatcher, JaroWinklerSimilarity, ColumnsIndex
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import deba
 from lib.post import extract_events_from_post, load_for_agency
 from lib.clean import canonicalize_officers
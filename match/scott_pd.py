@@ -1,4 +1,5 @@
-from datamatch import ColumnsIndex, JaroWinklerSimilarity, ThresholdMatcher
+from datamatch import ThresholdMatcher
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 import deba
 from lib.post import extract_events_from_post, load_for_agency
 import pandas as pd
@@ -1,10 +1,6 @@
 import pandas as pd
-from datamatch import (
-    ThresholdMatcher,
-    JaroWinklerSimilarity,
-    ColumnsIndex,
-    StringSimilarity,
-)
+from datamatch import ThresholdMatcher, StringSimilarity
+from lib.match import ColumnsIndex, JaroWinklerSimilarity
 
 import deba
 from lib.uid import gen_uid
@@ -22,7 +22,7 @@ def training_data():
 if __name__ == "__main__":  
     pdfs = read_pdfs()
     # training = training_data()
-    # ner = train_spacy_model(pdfs, training)
+    # ner = train_spacy_model(training)
     # ner.to_disk(
     #     deba.data("ner/louisiana_state_pd/model/reports_louisiana_state_pd_2020.model")
     # )
@@ -17,7 +17,7 @@ def training_data():
 if __name__ == "__main__":
     read_training_data = training_data()
     pdfs = read_pdfs()
-    # model = train_spacy_model(pdfs, read_training_data)
+    # model = train_spacy_model(read_training_data)
     # model = model.to_disk(deba.data("raw/new_orleans_pd/model/nopd_pib_reports.model"))
 
     load_model = spacy.load(
@@ -47,7 +47,7 @@ if __name__ == "__main__":
     pdfs_23 = read_pdfs_23()
     pdfs_22_rotated = read_pdfs_22_rotated()
     training = training_data()
-    # ner = train_spacy_model(pdfs_21, training)
+    # ner = train_spacy_model(training)
     # model = ner.to_disk(
     #     deba.data("ner/post/post_officer_history/model/post_officer_history_4.model")
     # )